@@ -1,28 +1,100 @@
+import os
 from knowledgebase import KnowledgeBase
 from engine import EnhancedQAEngine
-from flask import Flask, request, jsonify, session
+from cache import CacheRespostas, chave_pergunta
+from metricas import metricas
+from conversas import criar_armazem, novo_contexto, novo_id
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 
 # Configuração inicial do Flask
 app = Flask(__name__)
-app.secret_key = 'estigma'
 CORS(
     app,
-    supports_credentials=True,
     origins=["http://localhost:3000"],
-    methods=["GET", "POST", "OPTIONS"],
-    allow_headers=["Content-Type"]
+    methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Content-Type", "X-Conversa-Id"],
+    expose_headers=["X-Conversa-Id"]
 )
 
 # =============================================
 #  INICIALIZAÇÃO DO SISTEMA
 # =============================================
-kb = KnowledgeBase()
-qa_engine = EnhancedQAEngine(kb)
+def inicializar():
+    # Também usada pelo serve.py para recarregar a base sem derrubar o
+    # servidor: as rotas sempre leem os objetos globais atuais. Os globais
+    # só são trocados depois que tudo carregou; se a base nova falhar, os
+    # anteriores continuam valendo.
+    global kb, qa_engine, cache
+    nova_kb = KnowledgeBase(os.environ.get('CATALOGO', 'filmes.json'))
+    # BUSCA_INVERTIDA=1 troca a varredura da matriz pela busca top-k nas
+    # listas invertidas (melhor em catálogos grandes).
+    novo_motor = EnhancedQAEngine(
+        nova_kb, diretorio_indice='indice',
+        busca_invertida=os.environ.get('BUSCA_INVERTIDA', '0') == '1'
+    )
+    kb, qa_engine = nova_kb, novo_motor
+    cache = CacheRespostas(
+        capacidade=int(os.environ.get('CACHE_CAPACIDADE', 10000)),
+        ttl=float(os.environ.get('CACHE_TTL', 300))
+    )
+    # METRICAS=0 desliga a instrumentação; LIMITE_LENTA_MS=0 desliga o log
+    # de consultas lentas (logger "paa.lentas").
+    metricas.configurar(
+        ativo=os.environ.get('METRICAS', '1') != '0',
+        limite_lenta_ms=float(os.environ.get('LIMITE_LENTA_MS', 500))
+    )
+
+inicializar()
+
+# Fora de inicializar(): recarregar a base não apaga as conversas. Com
+# vários workers (serve.py), use CONVERSAS=arquivo:<diretório> para que
+# todos enxerguem o mesmo contexto.
+conversas = criar_armazem(
+    os.environ.get('CONVERSAS', 'memoria'),
+    capacidade=int(os.environ.get('CONVERSAS_CAPACIDADE', 100000)),
+    max_bytes=int(os.environ.get('CONVERSAS_MAX_BYTES', 64 * 1024 * 1024)),
+    ttl=float(os.environ.get('CONVERSAS_TTL', 1800)),
+    n_ultimos=int(os.environ.get('CONVERSAS_ULTIMOS', 5))
+)
 
 # =============================================
 #  ROTAS DA API
 # =============================================
+def resolver_perguntas(perguntas):
+    # O cache guarda o resultado antes do contexto da conversa, que depende
+    # de quem pergunta e por isso é aplicado sempre depois.
+    versao = qa_engine.versao
+    chaves = [chave_pergunta(pergunta) for pergunta in perguntas]
+    with metricas.etapa('cache'):
+        resultados = [cache.obter(chave, versao) for chave in chaves]
+    faltando = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if faltando:
+        novos = qa_engine.resolver_perguntas([perguntas[i] for i in faltando])
+        for i, resultado in zip(faltando, novos):
+            cache.guardar(chaves[i], versao, resultado)
+            resultados[i] = resultado
+    return resultados
+
+def obter_conversa(data):
+    # O id vem do cabeçalho X-Conversa-Id ou do campo "conversa_id"; sem
+    # ele, uma conversa nova é criada e o id volta na resposta.
+    conversa_id = request.headers.get('X-Conversa-Id') or data.get('conversa_id')
+    contexto = conversas.obter(str(conversa_id)) if conversa_id else None
+    return str(conversa_id or novo_id()), contexto or novo_contexto()
+
+def com_conversa(resposta, conversa_id):
+    resposta = jsonify(resposta)
+    resposta.headers['X-Conversa-Id'] = conversa_id
+    return resposta
+
+def responder_pergunta(pergunta, resultado, contexto):
+    resposta = qa_engine.montar_resposta(pergunta, resultado, contexto)
+    if 'filme' in resposta:
+        conversas.registrar(contexto, resposta['filme'], resposta['tipo'])
+        resposta['ultimo_filme'] = resposta['filme']
+    return resposta
+
 @app.route('/perguntar', methods=['POST'])
 def responder():
     data = request.get_json()
@@ -30,42 +102,157 @@ def responder():
     if not data or 'pergunta' not in data:
         return jsonify({'erro': 'Campo "pergunta" é obrigatório'}), 400
     
+    # Validado antes de qualquer alteração na conversa.
+    k = data.get('k')
+    if k is not None and (isinstance(k, bool) or not isinstance(k, int) or k < 1):
+        return jsonify({'erro': 'Campo "k" deve ser um inteiro positivo'}), 400
+    
     pergunta = data['pergunta']
+    metricas.contar('paa_perguntas_total')
     
     try:
-        pergunta_processada = qa_engine.preprocessor.preprocess(pergunta)
-        pergunta_processada = qa_engine.expand_synonyms(pergunta_processada)
-        
-        titulo_filme, score = qa_engine.find_most_similar(pergunta_processada)
-        
-        if score < 0.2:
-            return jsonify({'resposta': "Não tenho informações suficientes sobre esse filme."})
-        
-        filme = kb.get_filme(titulo_filme)
-        if not filme:
-            return jsonify({'resposta': "Filme não encontrado na base de dados."})
-        
-        question_type = qa_engine.identificar_tipo_pergunta(pergunta)
-        resposta = qa_engine.gerar_resposta_avancada(filme, question_type)
+        with metricas.requisicao(pergunta):
+            conversa_id, contexto = obter_conversa(data)
+            resposta = responder_pergunta(pergunta, resolver_perguntas([pergunta])[0], contexto)
+            conversas.salvar(conversa_id, contexto)
+            resposta['conversa_id'] = conversa_id
+            if k is not None:
+                with metricas.etapa('candidatos'):
+                    pergunta_processada = qa_engine.preprocessor.normalizar(pergunta)
+                    resposta['candidatos'] = [
+                        {'filme': titulo, 'score': score}
+                        for titulo, score in qa_engine.buscar_candidatos(pergunta_processada, k)
+                    ]
+        return com_conversa(resposta, conversa_id)
+    except Exception as e:
+        metricas.contar('paa_erros_total', rota='perguntar')
+        return jsonify({'erro': str(e)}), 500
 
-        session['ultimo_filme'] = titulo_filme
+@app.route('/perguntar_lote', methods=['POST'])
+def responder_lote():
+    data = request.get_json()
+    
+    if not data or not isinstance(data.get('perguntas'), list):
+        return jsonify({'erro': 'Campo "perguntas" (lista) é obrigatório'}), 400
+    
+    perguntas = data['perguntas']
+    metricas.contar('paa_perguntas_total', len(perguntas))
+    
+    try:
+        with metricas.requisicao(f"[lote de {len(perguntas)}] " + ' | '.join(map(str, perguntas[:3]))):
+            conversa_id, contexto = obter_conversa(data)
+            resultados = resolver_perguntas(perguntas)
+            
+            # O contexto da conversa é aplicado em ordem, como se cada pergunta
+            # tivesse chegado em um POST separado para /perguntar.
+            respostas = [
+                responder_pergunta(pergunta, resultado, contexto)
+                for pergunta, resultado in zip(perguntas, resultados)
+            ]
+            conversas.salvar(conversa_id, contexto)
         
-        return jsonify({
-            'pergunta': pergunta,
-            'resposta': resposta,
-            'filme': titulo_filme,
-            'score': float(score),
-            'ultimo_filme': session.get('ultimo_filme')
-        })
+        return com_conversa({'respostas': respostas, 'conversa_id': conversa_id}, conversa_id)
     except Exception as e:
+        metricas.contar('paa_erros_total', rota='perguntar_lote')
         return jsonify({'erro': str(e)}), 500
 
+# =============================================
+#  ADMINISTRAÇÃO DA BASE
+# =============================================
+# Desabilitada quando ADMIN_TOKEN não está definido no ambiente.
+def admin_autorizado():
+    token = os.environ.get('ADMIN_TOKEN')
+    return bool(token) and request.headers.get('X-Admin-Token') == token
+
+# Marcada pelo serve.py. Com vários workers, uma alteração feita aqui só
+# valeria no worker que recebeu a requisição (e sumiria no próximo SIGHUP):
+# lá a base é alterada no catálogo, seguida de kill -HUP.
+PRE_FORK = False
+
+def recusar_admin():
+    if not admin_autorizado():
+        return jsonify({'erro': 'Não autorizado'}), 403
+    if PRE_FORK:
+        return jsonify({
+            'erro': 'Alterações pela API não são suportadas no serve.py; '
+                    'altere o catálogo e envie SIGHUP ao processo principal.'
+        }), 409
+    return None
+
+@app.route('/admin/filmes', methods=['POST'])
+def adicionar_filme():
+    recusa = recusar_admin()
+    if recusa:
+        return recusa
+    try:
+        filme = qa_engine.adicionar_filme(request.get_json())
+        return jsonify({'filme': filme.como_dict()}), 201
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+@app.route('/admin/filmes/<path:titulo>', methods=['PUT'])
+def atualizar_filme(titulo):
+    recusa = recusar_admin()
+    if recusa:
+        return recusa
+    try:
+        filme = qa_engine.atualizar_filme(titulo, request.get_json())
+        return jsonify({'filme': filme.como_dict()})
+    except KeyError:
+        return jsonify({'erro': f'Filme não encontrado: {titulo}'}), 404
+    except ValueError as e:
+        return jsonify({'erro': str(e)}), 400
+
+@app.route('/admin/filmes/<path:titulo>', methods=['DELETE'])
+def remover_filme(titulo):
+    recusa = recusar_admin()
+    if recusa:
+        return recusa
+    try:
+        filme = qa_engine.remover_filme(titulo)
+        return jsonify({'filme': filme.como_dict()})
+    except KeyError:
+        return jsonify({'erro': f'Filme não encontrado: {titulo}'}), 404
+
+@app.route('/pronto', methods=['GET'])
+def pronto():
+    return jsonify({
+        'status': 'pronto',
+        'pid': os.getpid(),
+        'filmes': len(kb.indice_titulos),
+        'versao': qa_engine.versao
+    })
+
+@app.route('/cache', methods=['GET'])
+def estatisticas_cache():
+    return jsonify(cache.estatisticas())
+
+@app.route('/metrics', methods=['GET'])
+def exportar_metricas():
+    estatisticas = cache.estatisticas()
+    # Cache de radicais do pré-processador (palavra -> radicais).
+    radicais = qa_engine.preprocessor.estatisticas_cache()
+    texto = metricas.exportar([
+        ('paa_cache_hits_total', 'counter', estatisticas['hits']),
+        ('paa_cache_misses_total', 'counter', estatisticas['misses']),
+        ('paa_cache_tamanho', 'gauge', estatisticas['tamanho']),
+        ('paa_radicais_hits_total', 'counter', radicais['hits']),
+        ('paa_radicais_misses_total', 'counter', radicais['misses']),
+        ('paa_radicais_tamanho', 'gauge', radicais['tamanho']),
+        ('paa_indice_versao', 'gauge', qa_engine.versao),
+        ('paa_filmes', 'gauge', len(kb.indice_titulos))
+    ])
+    return Response(texto, mimetype='text/plain; version=0.0.4')
+
 @app.route('/debug_sessao', methods=['GET'])
 def debug_sessao():
+    conversa_id = request.headers.get('X-Conversa-Id') or request.args.get('conversa_id')
+    contexto = conversas.obter(conversa_id) if conversa_id else None
     return jsonify({
-        'session_id': session.sid,
-        'ultimo_filme': session.get('ultimo_filme'),
-        'todos_dados': dict(session)
+        'conversa_id': conversa_id,
+        'ultimo_filme': contexto['filmes'][-1] if contexto and contexto['filmes'] else None,
+        'contexto': contexto,
+        'armazenamento': conversas.estatisticas()
     })
 
 if __name__ == '__main__':
@@ -0,0 +1,277 @@
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import numpy as np
+from scipy import sparse
+from sklearn.preprocessing import normalize
+from index_store import IndiceTfidf, calcular_idf
+from knowledgebase import KnowledgeBase, ler_catalogo, salvar_jsonl, normalizar
+from metricas import metricas
+
+# =============================================
+#  CATÁLOGO SINTÉTICO
+# =============================================
+def indice_sintetico(n_docs, n_termos=200000, termos_por_doc=12, seed=0):
+    # Termos com distribuição de Zipf, como em texto real: poucos termos
+    # muito comuns e uma cauda longa de termos raros.
+    rng = np.random.default_rng(seed)
+    linhas = np.repeat(np.arange(n_docs), termos_por_doc)
+    termos = np.minimum(rng.zipf(1.3, n_docs * termos_por_doc) - 1, n_termos - 1)
+    contagens = sparse.csr_matrix(
+        (np.ones(len(linhas)), (linhas, termos)), shape=(n_docs, n_termos)
+    )
+    contagens.sum_duplicates()
+    df = np.bincount(contagens.indices, minlength=n_termos)
+    idf = calcular_idf(df, n_docs)
+    base = normalize(contagens @ sparse.diags(idf), norm='l2').tocsr()
+    vocabulario = {f"t{i}": i for i in range(n_termos)}
+    titulos = [f"filme {i}" for i in range(n_docs)]
+    return IndiceTfidf(vocabulario, titulos, base, idf, df, n_docs)
+
+def perguntas_sinteticas(indice, n, seed=1):
+    # Cada pergunta imita "quem dirigiu <título>": os dois termos mais raros
+    # de um documento existente (o título), mais um termo qualquer do mesmo
+    # documento e um dos termos mais comuns do catálogo.
+    rng = np.random.default_rng(seed)
+    perguntas = []
+    for doc in rng.integers(0, indice.base.shape[0], n):
+        termos = indice.base.indices[indice.base.indptr[doc]:indice.base.indptr[doc + 1]]
+        raros = list(termos[np.argsort(-indice.idf_base[termos])[:2]])
+        escolhidos = raros + [rng.choice(termos), int(rng.integers(0, 5))]
+        perguntas.append(' '.join(f"t{t}" for t in escolhidos))
+    return perguntas
+
+def percentis(amostras):
+    amostras = np.asarray(amostras) * 1000
+    return {
+        'p50_ms': float(np.percentile(amostras, 50)),
+        'p95_ms': float(np.percentile(amostras, 95)),
+        'p99_ms': float(np.percentile(amostras, 99))
+    }
+
+# =============================================
+#  BUSCA TOP-K
+# =============================================
+def benchmark_top_k(tamanhos, n_perguntas=200, k=10, comparar_ate=100000):
+    resultados = []
+    for n_docs in tamanhos:
+        indice = indice_sintetico(n_docs)
+        indice.postings()
+        perguntas = perguntas_sinteticas(indice, n_perguntas)
+
+        tempos_invertido = []
+        for pergunta in perguntas:
+            inicio = time.perf_counter()
+            indice.top_k(pergunta, k)
+            tempos_invertido.append(time.perf_counter() - inicio)
+        resultado = {'n_docs': n_docs, 'nnz': int(indice.base.nnz), 'invertido': percentis(tempos_invertido)}
+
+        # A varredura completa só é medida (e comparada) até comparar_ate
+        # documentos; acima disso ela domina o tempo do benchmark.
+        if n_docs <= comparar_ate:
+            tempos_matriz = []
+            divergencias = 0
+            for pergunta in perguntas:
+                inicio = time.perf_counter()
+                titulo, score = indice.mais_similares([pergunta])[0]
+                tempos_matriz.append(time.perf_counter() - inicio)
+                melhor = indice.top_k(pergunta, 1)
+                if not melhor or melhor[0][0] != titulo or not np.isclose(melhor[0][1], score):
+                    divergencias += 1
+            resultado['matriz'] = percentis(tempos_matriz)
+            resultado['divergencias_top1'] = divergencias
+        resultados.append(resultado)
+        print(json.dumps(resultado), file=sys.stderr)
+    return resultados
+
+# =============================================
+#  MOTOR DE PERGUNTAS (banco_de_perguntas)
+# =============================================
+ETAPAS = [
+    'entidades', 'preprocessamento', 'sinonimos', 'vetorizacao', 'similaridade', 'busca_invertida',
+    'tipo', 'consulta_estruturada', 'resposta'
+]
+
+def palavra_sintetica(rng):
+    silabas = ['ka', 'lo', 'mi', 'ter', 'van', 'dru', 'sel', 'po', 'rin', 'gu', 'zen', 'ba']
+    return ''.join(rng.choice(silabas) for _ in range(rng.randint(2, 4))).capitalize()
+
+def catalogo_ampliado(data_file, n_extras, destino, seed=0):
+    # O catálogo real mais n_extras filmes inventados, que só servem de
+    # distração: as perguntas do banco continuam tendo resposta certa.
+    rng = random.Random(seed)
+    palavras = sorted({palavra_sintetica(rng) for _ in range(5000)})
+    pessoas = [f"{rng.choice(palavras)} {rng.choice(palavras)}" for _ in range(20000)]
+    generos = ['Action', 'Drama', 'Comedy', 'Horror', 'Sci-Fi', 'Romance', 'Thriller', 'Animation']
+
+    def extras():
+        for i in range(n_extras):
+            yield {
+                'titulo': f"{' '.join(rng.sample(palavras, rng.randint(1, 3)))} {i}",
+                'diretor': [rng.choice(pessoas)],
+                'atores': rng.sample(pessoas, 4),
+                'genero': rng.sample(generos, 2),
+                'ano': str(rng.randint(1950, 2024)),
+                'sinopse': 'Sinopse não disponível'
+            }
+
+    def todos():
+        yield from ler_catalogo(data_file)
+        yield from extras()
+    salvar_jsonl(todos(), destino)
+    return destino
+
+def medir_motor(motor, banco, repeticoes=3):
+    # Cada pergunta passa por motor.responder(), o mesmo caminho do
+    # /perguntar e do responder_lote.py, e as etapas vêm dos cronômetros do
+    # próprio motor (metricas.etapa). Etapas puladas (TF-IDF quando o
+    # vinculador resolve o filme) não entram nos percentis da etapa.
+    # Como o vinculador resolve quase todo o banco, a busca por similaridade
+    # é medida à parte, em uma segunda passada só por ela (etapas_tfidf e
+    # total_tfidf): é o caminho das perguntas que não citam o título.
+    metricas.configurar(ativo=True, limite_lenta_ms=0)
+    tempos = {etapa: [] for etapa in ETAPAS}
+    tempos_tfidf = {}
+    totais, totais_tfidf = [], []
+    acertos_filme = acertos_tfidf = acertos_tipo = com_filme = vinculadas = 0
+
+    for rodada in range(repeticoes):
+        for item in banco:
+            with metricas.requisicao(item['pergunta']) as requisicao:
+                resposta = motor.responder([item['pergunta']])[0]
+            for etapa, duracao in requisicao.etapas.items():
+                tempos.setdefault(etapa, []).append(duracao)
+            totais.append(requisicao.duracao)
+
+            with metricas.requisicao(item['pergunta']) as busca:
+                titulo_tfidf, _ = motor._buscar_similares([item['pergunta']])[0]
+            for etapa, duracao in busca.etapas.items():
+                tempos_tfidf.setdefault(etapa, []).append(duracao)
+            totais_tfidf.append(busca.duracao)
+
+            if rodada == 0:
+                # O filme de cada pergunta vem do rótulo "titulo" do banco.
+                if item.get('titulo'):
+                    esperado = normalizar(item['titulo'])
+                    com_filme += 1
+                    acertos_filme += normalizar(resposta.get('filme', '')) == esperado
+                    acertos_tfidf += normalizar(titulo_tfidf) == esperado
+                vinculadas += 'preprocessamento' not in requisicao.etapas
+                tipo = resposta.get('tipo')
+                tipos = tipo if isinstance(tipo, list) else [tipo]
+                acertos_tipo += sorted(tipos) == sorted(item['tipo'])
+
+    perguntas = [item['pergunta'] for item in banco]
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        motor.responder(perguntas)
+    tempo_lote = time.perf_counter() - inicio
+
+    # acuracia_filme_tfidf é a acurácia só da busca por similaridade, para
+    # comparar com a do caminho completo (com o vinculador de entidades).
+    # acuracia_tipo é medida sobre as próprias perguntas de treino do
+    # classificador: serve para pegar regressões, não como acurácia real.
+    return {
+        'n_filmes': len(motor.kb.indice_titulos),
+        'n_perguntas': len(banco),
+        'etapas': {etapa: percentis(amostras) for etapa, amostras in tempos.items() if amostras},
+        'total': percentis(totais),
+        'etapas_tfidf': {etapa: percentis(amostras) for etapa, amostras in tempos_tfidf.items()},
+        'total_tfidf': percentis(totais_tfidf),
+        'qps': len(totais) / sum(totais),
+        'qps_lote': len(perguntas) * repeticoes / tempo_lote,
+        'perguntas_com_filme': com_filme,
+        'fracao_vinculada': vinculadas / len(banco),
+        'acuracia_filme': acertos_filme / com_filme if com_filme else 0.0,
+        'acuracia_filme_tfidf': acertos_tfidf / com_filme if com_filme else 0.0,
+        'acuracia_tipo': acertos_tipo / len(banco)
+    }
+
+def benchmark_motor(data_file='filmes.json', extras=(0,), repeticoes=3, busca_invertida=False):
+    from engine import EnhancedQAEngine, banco_de_perguntas
+    resultados = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_extras in extras:
+            catalogo = data_file
+            if n_extras:
+                catalogo = catalogo_ampliado(data_file, n_extras, os.path.join(tmp, f'catalogo-{n_extras}.jsonl'))
+            inicio = time.perf_counter()
+            motor = EnhancedQAEngine(KnowledgeBase(catalogo), busca_invertida=busca_invertida)
+            carga = time.perf_counter() - inicio
+            resultado = medir_motor(motor, banco_de_perguntas, repeticoes)
+            resultado['carga_s'] = carga
+            resultados.append(resultado)
+            print(json.dumps({k: v for k, v in resultado.items() if k != 'etapas'}), file=sys.stderr)
+    return resultados
+
+def comparar_com_baseline(resultados, baseline, tolerancia_latencia=0.25, tolerancia_acuracia=0.01):
+    # Compara catálogos do mesmo tamanho. A latência pode piorar até
+    # tolerancia_latencia (fração do baseline); a acurácia, até
+    # tolerancia_acuracia (pontos absolutos).
+    regressoes = []
+    anteriores = {resultado['n_filmes']: resultado for resultado in baseline}
+    for atual in resultados:
+        anterior = anteriores.get(atual['n_filmes'])
+        if anterior is None:
+            continue
+        n = atual['n_filmes']
+        # A busca por similaridade conta por etapa: perguntas que não citam
+        # o título passam por ela, e o total quase não a vê.
+        latencias = [('total', atual['total'], anterior['total'])]
+        if 'total_tfidf' in anterior:
+            latencias.append(('total_tfidf', atual['total_tfidf'], anterior['total_tfidf']))
+            latencias.extend(
+                (etapa, atual['etapas_tfidf'][etapa], tempos)
+                for etapa, tempos in anterior['etapas_tfidf'].items()
+                if etapa in atual['etapas_tfidf']
+            )
+        for nome, tempos, referencia in latencias:
+            for metrica in ('p50_ms', 'p95_ms'):
+                limite = referencia[metrica] * (1 + tolerancia_latencia)
+                if tempos[metrica] > limite:
+                    regressoes.append(f"{n} filmes: {metrica} {nome} {tempos[metrica]:.3f} > {limite:.3f}")
+        for metrica in ('acuracia_filme', 'acuracia_filme_tfidf', 'acuracia_tipo'):
+            if metrica in anterior and atual[metrica] < anterior[metrica] - tolerancia_acuracia:
+                regressoes.append(f"{n} filmes: {metrica} {atual[metrica]:.3f} < {anterior[metrica]:.3f}")
+    return regressoes
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmarks do motor de perguntas.')
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    topk = sub.add_parser('topk', help='busca top-k por listas invertidas em catálogos sintéticos')
+    topk.add_argument('--docs', type=int, nargs='+', default=[10000, 100000, 1000000])
+    topk.add_argument('--perguntas', type=int, default=200)
+    topk.add_argument('-k', type=int, default=10)
+
+    motor = sub.add_parser('motor', help='latência por etapa e acurácia sobre o banco_de_perguntas')
+    motor.add_argument('--catalogo', default='filmes.json')
+    motor.add_argument('--extras', type=int, nargs='+', default=[0, 10000],
+                       help='filmes sintéticos somados ao catálogo em cada rodada')
+    motor.add_argument('--repeticoes', type=int, default=3)
+    motor.add_argument('--busca-invertida', action='store_true', help='mede a busca top-k nas listas invertidas')
+    motor.add_argument('--saida', help='grava o resultado em JSON (pode virar o próximo baseline)')
+    motor.add_argument('--baseline', help='JSON de uma execução anterior; sai com erro se houver regressão')
+    motor.add_argument('--tolerancia-latencia', type=float, default=0.25)
+    motor.add_argument('--tolerancia-acuracia', type=float, default=0.01)
+
+    args = parser.parse_args()
+    if args.comando == 'topk':
+        saida = benchmark_top_k(args.docs, args.perguntas, args.k)
+    elif args.comando == 'motor':
+        saida = benchmark_motor(args.catalogo, args.extras, args.repeticoes, args.busca_invertida)
+        if args.saida:
+            with open(args.saida, 'w', encoding='utf-8') as f:
+                json.dump(saida, f, indent=2)
+    print(json.dumps(saida, indent=2))
+
+    if args.comando == 'motor' and args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            regressoes = comparar_com_baseline(saida, json.load(f), args.tolerancia_latencia, args.tolerancia_acuracia)
+        for regressao in regressoes:
+            print(f"REGRESSÃO: {regressao}", file=sys.stderr)
+        sys.exit(1 if regressoes else 0)
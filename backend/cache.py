@@ -0,0 +1,66 @@
+import time
+import threading
+from collections import OrderedDict
+
+def chave_pergunta(pergunta):
+    # Todas as etapas do motor ignoram caixa e espaços repetidos, então
+    # perguntas que só diferem nisso têm exatamente o mesmo resultado.
+    return ' '.join(pergunta.lower().split())
+
+# Cache LRU com expiração (TTL). Cada entrada é válida só para a versão da
+# base em que foi calculada: quando a versão muda, o cache é esvaziado.
+class CacheRespostas:
+    def __init__(self, capacidade=10000, ttl=300, relogio=time.monotonic):
+        self.capacidade = capacidade
+        self.ttl = ttl
+        self.relogio = relogio
+        self.versao = None
+        self.hits = 0
+        self.misses = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _verificar_versao(self, versao):
+        # Devolve False para versões mais antigas que a do cache: quem as usa
+        # está com um índice desatualizado e não deve ler nem gravar.
+        if self.versao is None or versao > self.versao:
+            self._entradas.clear()
+            self.versao = versao
+        return versao == self.versao
+
+    def obter(self, chave, versao):
+        with self._lock:
+            entrada = self._entradas.get(chave) if self._verificar_versao(versao) else None
+            if entrada is None or entrada[0] < self.relogio():
+                if entrada is not None:
+                    del self._entradas[chave]
+                self.misses += 1
+                return None
+            self._entradas.move_to_end(chave)
+            self.hits += 1
+            return entrada[1]
+
+    def guardar(self, chave, versao, valor):
+        with self._lock:
+            if not self._verificar_versao(versao):
+                return
+            self._entradas[chave] = (self.relogio() + self.ttl, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.capacidade:
+                self._entradas.popitem(last=False)
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estatisticas(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'taxa_acerto': self.hits / total if total else 0.0,
+                'tamanho': len(self._entradas),
+                'capacidade': self.capacidade,
+                'ttl': self.ttl
+            }
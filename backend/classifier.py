@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import MultiLabelBinarizer
+
+# Classificador multi-rótulo treinado uma vez sobre o banco de perguntas:
+# n-gramas de caracteres + um modelo linear por tipo. O custo de cada
+# consulta depende do tamanho do modelo, não do número de exemplos.
+class QuestionTypeClassifier:
+    def __init__(self, banco_de_perguntas):
+        self.vectorizer = TfidfVectorizer(analyzer='char_wb', ngram_range=(2, 4))
+        self.binarizer = MultiLabelBinarizer()
+        X = self.vectorizer.fit_transform([item['pergunta'].lower() for item in banco_de_perguntas])
+        Y = self.binarizer.fit_transform([item['tipo'] for item in banco_de_perguntas])
+        self.tipos = self.binarizer.classes_
+        # Um modelo binário por tipo, empilhados em uma única matriz de pesos
+        # para que a consulta seja um só produto esparso.
+        modelos = [LogisticRegression(C=100, max_iter=1000).fit(X, Y[:, i]) for i in range(Y.shape[1])]
+        self.pesos = np.vstack([modelo.coef_[0] for modelo in modelos]).T
+        self.intercepto = np.array([modelo.intercept_[0] for modelo in modelos])
+
+    def classificar_lote(self, perguntas):
+        # Lista vazia = nenhum tipo reconhecido; 'geral' só aparece sozinho.
+        X = self.vectorizer.transform([pergunta.lower() for pergunta in perguntas])
+        decisoes = X @ self.pesos + self.intercepto
+        resultados = []
+        for linha in decisoes > 0:
+            tipos = list(self.tipos[linha])
+            if len(tipos) > 1 and 'geral' in tipos:
+                tipos.remove('geral')
+            resultados.append(tipos)
+        return resultados
+
+    def classificar(self, pergunta):
+        return self.classificar_lote([pergunta])[0]
@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+# Contexto de conversa guardado no servidor, indexado pelo id que o cliente
+# manda (cabeçalho X-Conversa-Id ou campo "conversa_id"). Cada contexto
+# guarda os últimos filmes e tipos de pergunta, do mais antigo ao mais novo:
+#   {'filmes': ['Logan', 'Thor'], 'tipos': ['diretor', 'ano']}
+
+def novo_id():
+    return uuid.uuid4().hex
+
+def novo_contexto():
+    return {'filmes': [], 'tipos': []}
+
+class ArmazemConversas(ABC):
+    # Limpeza periódica, sempre fora do caminho das requisições. Por padrão
+    # cada processo cuida da sua (ver ArmazemArquivo); o serve.py a desliga
+    # e chama limpar_se_preciso() no processo principal, uma limpeza para
+    # todos os workers.
+    limpeza_automatica = True
+
+    def __init__(self, ttl=1800, n_ultimos=5, relogio=time.time):
+        self.ttl = ttl
+        self.n_ultimos = n_ultimos
+        self.relogio = relogio
+
+    def registrar(self, contexto, filme, tipo):
+        # Só altera o dicionário; quem chama decide quando salvar (um lote
+        # de perguntas salva uma vez no fim).
+        for chave, valor in (('filmes', filme), ('tipos', tipo)):
+            if valor is None:
+                continue
+            lista = [item for item in contexto[chave] if item != valor]
+            lista.append(valor)
+            contexto[chave] = lista[-self.n_ultimos:]
+        return contexto
+
+    @abstractmethod
+    def obter(self, conversa_id):
+        pass
+
+    @abstractmethod
+    def salvar(self, conversa_id, contexto):
+        pass
+
+    @abstractmethod
+    def remover(self, conversa_id):
+        pass
+
+    def limpar_se_preciso(self):
+        pass
+
+    def estatisticas(self):
+        return {}
+
+# =============================================
+#  EM MEMÓRIA (um processo)
+# =============================================
+class ArmazemMemoria(ArmazemConversas):
+    # LRU com TTL e limite aproximado de memória (em bytes de texto
+    # guardado). Estourado o limite, as conversas menos usadas saem primeiro.
+    def __init__(self, capacidade=100000, max_bytes=64 * 1024 * 1024, **kwargs):
+        super().__init__(**kwargs)
+        self.capacidade = capacidade
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _tamanho(conversa_id, contexto):
+        # Estimativa: o texto mais um custo fixo por entrada e por item.
+        itens = contexto['filmes'] + contexto['tipos']
+        return 200 + len(conversa_id) + sum(len(item) + 60 for item in itens)
+
+    def obter(self, conversa_id):
+        with self._lock:
+            entrada = self._entradas.get(conversa_id)
+            if entrada is None:
+                return None
+            expira, tamanho, contexto = entrada
+            if expira < self.relogio():
+                del self._entradas[conversa_id]
+                self.bytes -= tamanho
+                return None
+            self._entradas.move_to_end(conversa_id)
+            return {chave: list(valor) for chave, valor in contexto.items()}
+
+    def salvar(self, conversa_id, contexto):
+        tamanho = self._tamanho(conversa_id, contexto)
+        with self._lock:
+            antiga = self._entradas.pop(conversa_id, None)
+            if antiga is not None:
+                self.bytes -= antiga[1]
+            self._entradas[conversa_id] = (self.relogio() + self.ttl, tamanho, contexto)
+            self.bytes += tamanho
+            while self._entradas and (len(self._entradas) > self.capacidade or self.bytes > self.max_bytes):
+                _, (_, tamanho_antigo, _) = self._entradas.popitem(last=False)
+                self.bytes -= tamanho_antigo
+
+    def remover(self, conversa_id):
+        with self._lock:
+            entrada = self._entradas.pop(conversa_id, None)
+            if entrada is not None:
+                self.bytes -= entrada[1]
+
+    def estatisticas(self):
+        with self._lock:
+            return {
+                'backend': 'memoria',
+                'conversas': len(self._entradas),
+                'bytes': self.bytes,
+                'capacidade': self.capacidade,
+                'max_bytes': self.max_bytes
+            }
+
+# =============================================
+#  EM ARQUIVOS (vários workers)
+# =============================================
+class ArmazemArquivo(ArmazemConversas):
+    # Um arquivo JSON por conversa, gravado com rename atômico, para que os
+    # workers do serve.py enxerguem o mesmo contexto. Em Linux, um diretório
+    # em /dev/shm mantém tudo em memória compartilhada.
+    def __init__(self, diretorio, capacidade=100000, intervalo_limpeza=60, **kwargs):
+        super().__init__(**kwargs)
+        self.diretorio = diretorio
+        self.capacidade = capacidade
+        self.intervalo_limpeza = intervalo_limpeza
+        self._ultima_limpeza = self.relogio()
+        self._pid_limpeza = None
+        self._lock_limpeza = threading.Lock()
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, conversa_id):
+        nome = hashlib.sha1(conversa_id.encode('utf-8')).hexdigest()
+        return os.path.join(self.diretorio, f"{nome}.json")
+
+    def obter(self, conversa_id):
+        caminho = self._caminho(conversa_id)
+        try:
+            if os.path.getmtime(caminho) + self.ttl < self.relogio():
+                os.remove(caminho)
+                return None
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def salvar(self, conversa_id, contexto):
+        caminho = self._caminho(conversa_id)
+        tmp = f"{caminho}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(contexto, f, ensure_ascii=False)
+        os.replace(tmp, caminho)
+        if self.limpeza_automatica:
+            self._iniciar_limpeza()
+
+    def remover(self, conversa_id):
+        try:
+            os.remove(self._caminho(conversa_id))
+        except FileNotFoundError:
+            pass
+
+    def _arquivos(self):
+        arquivos = []
+        for entrada in os.scandir(self.diretorio):
+            if entrada.name.endswith('.json'):
+                try:
+                    arquivos.append((entrada.stat().st_mtime, entrada.path))
+                except FileNotFoundError:
+                    pass
+        return arquivos
+
+    def _iniciar_limpeza(self):
+        # limpar() percorre e ordena o diretório inteiro: roda em uma thread
+        # à parte, criada no primeiro salvar de cada processo (threads não
+        # passam pelo fork dos workers).
+        if self._pid_limpeza == os.getpid():
+            return
+        with self._lock_limpeza:
+            if self._pid_limpeza != os.getpid():
+                self._pid_limpeza = os.getpid()
+                threading.Thread(target=self._limpar_periodicamente, daemon=True).start()
+
+    def _limpar_periodicamente(self):
+        while True:
+            time.sleep(self.intervalo_limpeza)
+            try:
+                self.limpar()
+            except OSError as e:
+                print(f"Falha ao limpar as conversas em {self.diretorio}: {e}", file=sys.stderr)
+
+    def limpar_se_preciso(self):
+        if self._ultima_limpeza + self.intervalo_limpeza < self.relogio():
+            self.limpar()
+
+    def limpar(self):
+        # Remove as conversas expiradas e, acima da capacidade, as que estão
+        # há mais tempo sem uso.
+        self._ultima_limpeza = self.relogio()
+        limite = self.relogio() - self.ttl
+        arquivos = sorted(self._arquivos())
+        excesso = max(0, len(arquivos) - self.capacidade)
+        for i, (mtime, caminho) in enumerate(arquivos):
+            if i >= excesso and mtime >= limite:
+                break
+            try:
+                os.remove(caminho)
+            except FileNotFoundError:
+                pass
+
+    def estatisticas(self):
+        return {
+            'backend': 'arquivo',
+            'diretorio': self.diretorio,
+            'conversas': len(self._arquivos()),
+            'capacidade': self.capacidade
+        }
+
+def criar_armazem(configuracao='memoria', **kwargs):
+    # "memoria" ou "arquivo:<diretório>".
+    if configuracao == 'memoria':
+        return ArmazemMemoria(**kwargs)
+    if configuracao.startswith('arquivo:'):
+        kwargs.pop('max_bytes', None)
+        return ArmazemArquivo(configuracao.split(':', 1)[1], **kwargs)
+    raise ValueError(f"Armazenamento de conversas desconhecido: {configuracao}")
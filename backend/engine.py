@@ -1,233 +1,441 @@
+import os
 import re
-import random
-import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from fuzzywuzzy import fuzz
-from flask import session
+import threading
 from preprocessor import TextPreprocessor
+from classifier import QuestionTypeClassifier
+from knowledgebase import normalizar
+from index_store import IndiceTfidf, obter_indice
+from metricas import metricas
+from entidades import VinculadorEntidades, construir_automato, obter_automato, palavras_ignoradas
+from fragmentos import Fragmentos, obter_fragmentos, gerar_fragmentos, escolher, escolher_direta
+
+# "Quais filmes de 2008?", "Filmes dirigidos por Jon Favreau",
+# "Filmes com Robert Downey Jr.", "Filmes de ação"
+# "Filmes do diretor Christopher Nolan", "Filmes do ano 2017" (a preposição
+# depois do campo é opcional)
+CONSULTA_FILMES = re.compile(
+    r'\bfilmes\b\s*(?:(?P<campo>do diretor|da diretora|do ator|da atriz|do genero|do ano)'
+    r'(?:\s+(?:de|do|da|com|por|em))?|(?P<filtro>dirigidos|estrelados|lancados)?\s+(?:de|do|da|com|por|em))'
+    r'\s+(?P<chave>.+)$'
+)
+
+# Perguntas elípticas que continuam a anterior: "e do Logan?", "e o ano?"
+CONTINUACAO = re.compile(r'^e\s+(?:o|a|os|as|do|da|dos|das|de|em|no|na|com)\b')
+
+# Abaixo deste score o filme mais parecido não é considerado uma resposta.
+LIMITE_SIMILARIDADE = 0.2
 
 class EnhancedQAEngine:
-    def __init__(self, knowledge_base):
+    padroes_tipo = {
+        'diretor': r'diretor|dirigiu|realizador',
+        'ator': r'ator|atriz|elenco|estrela',
+        'genero': r'gênero|genero|tipo|estilo',
+        'ano': r'ano|lançamento|lançou',
+        'sinopse': r'sinopse|resumo|enredo'
+    }
+
+    generos_pt = {
+        'acao': 'action',
+        'aventura': 'adventure',
+        'animacao': 'animation',
+        'comedia': 'comedy',
+        'crime': 'crime',
+        'drama': 'drama',
+        'familia': 'family',
+        'fantasia': 'fantasy',
+        'ficcao cientifica': 'scifi',
+        'misterio': 'mystery',
+        'suspense': 'thriller',
+        'terror': 'horror'
+    }
+
+    def __init__(self, knowledge_base, diretorio_indice=None, busca_invertida=False, vincular_entidades=True):
         self.kb = knowledge_base
+        # Com busca_invertida, a busca percorre só as listas dos termos da
+        # pergunta (top-k com MaxScore) em vez de pontuar a base inteira.
+        self.busca_invertida = busca_invertida
         self.preprocessor = TextPreprocessor()
-        self.vectorizer = TfidfVectorizer()
-        self.tfidf_matrix = self.vectorizer.fit_transform([self.preprocessor.preprocess(doc) for doc in self.kb.corpus])
+        # Perguntas que citam um único filme pelo título são resolvidas pelo
+        # vinculador de entidades, sem TF-IDF (ver entidades.py). O autômato
+        # é gravado junto do índice; sem diretorio_indice, é construído aqui,
+        # em tempo proporcional ao catálogo.
+        ignoradas = palavras_ignoradas(self.preprocessor)
+        automato = None
+        if diretorio_indice and os.path.exists(self.kb.data_file):
+            indice = obter_indice(self.kb, self.preprocessor, diretorio_indice)
+            self.fragmentos = obter_fragmentos(self.kb, diretorio_indice)
+            if vincular_entidades:
+                automato = obter_automato(self.kb, ignoradas, diretorio_indice)
+        else:
+            indice = IndiceTfidf.construir(self.kb, self.preprocessor)
+            self.fragmentos = Fragmentos.construir(self.kb)
+            if vincular_entidades:
+                automato = construir_automato(self.kb, ignoradas)
+        self.vinculador = VinculadorEntidades(self.kb, ignoradas, automato) if automato is not None else None
+        # Referência trocada de uma vez a cada alteração; leitores pegam o
+        # snapshot atual e o usam até o fim da consulta.
+        self.indice = indice
+        # Incrementada depois de cada troca de índice; caches de respostas
+        # usam a versão para saber quando descartar resultados.
+        self.versao = 0
+        self._lock_escrita = threading.Lock()
+        self._linhas_por_titulo = {}
+        for linha, titulo in enumerate(indice.titulos):
+            if linha not in indice.removidos:
+                self._linhas_por_titulo.setdefault(normalizar(titulo), linha)
         self.banco_de_perguntas = banco_de_perguntas
-        self.padroes_perguntas = self._construir_padroes()
+        self.classificador = QuestionTypeClassifier(self.banco_de_perguntas)
         self.sinonimos = {
             'diretor': ['dirigiu', 'realizador', 'criou','idealizador', 'criador', 'direção', 'diretora', 'diretores', 'dirigido'],
             'ator': ['elenco', 'estrela', 'protagonista', 'atores', 'atriz', 'elenco'],
             'genero': ['categoria', 'tipo', 'estilo', 'tema', 'característica', 'ação', 'aventura', 'ficção científica', 'fantasia', 'terror', 'comédia'],
             'ano': ['lançamento', 'estreia', 'data', 'quando', 'lançou', 'lançado'],
         }
+        self.preprocessor.definir_sinonimos(self.sinonimos)
+        # As perguntas de exemplo aquecem o cache de radicais com o
+        # vocabulário típico das perguntas. O corpus não: carregando do
+        # artefato, pré-processar a base inteira de novo tornaria a partida
+        # proporcional ao catálogo, que é o que o artefato evita (no fit em
+        # memória o corpus já passa pelo cache de qualquer forma).
+        self.preprocessor.aquecer(item['pergunta'] for item in self.banco_de_perguntas)
     
-    def _construir_padroes(self):
-        padroes = {
-            'diretor': [],
-            'ator': [],
-            'genero': [],
-            'ano': [],
-            'geral': []
-        }
-        for item in self.banco_de_perguntas:
-            for tipo in item['tipo']:
-                padroes[tipo].append(item['pergunta'])
-        return padroes
-
     def expand_synonyms(self, text):
-        for termo, lista_sinonimos in self.sinonimos.items():
-            for sinonimo in lista_sinonimos:
-                text = text.replace(sinonimo, termo)
-        return text
-    
-    def find_most_similar(self, processed_question):
-        try:
-            question_vec = self.vectorizer.transform([processed_question])
-            similarities = cosine_similarity(question_vec, self.tfidf_matrix)
-            most_similar_idx = np.argmax(similarities)
-            score = similarities[0][most_similar_idx]
-            
-            if score < 0.2 and 'ultimo_filme' in session:
-                last_film = session['ultimo_filme']
-                if last_film in [f['titulo'] for f in self.kb.filmes]:
+        return ' '.join(self.preprocessor.aplicar_sinonimos(text.split()))
+    
+    def find_most_similar_batch(self, perguntas):
+        # Filmes citados pelo título entram com score 1.0; o restante passa
+        # por uma única vetorização e um único produto esparso.
+        resultados = [None] * len(perguntas)
+        vinculador = self.vinculador
+        if vinculador is not None:
+            with metricas.etapa('entidades'):
+                for i, pergunta in enumerate(perguntas):
+                    titulo = vinculador.vincular(pergunta)
+                    if titulo is not None:
+                        resultados[i] = (titulo, 1.0)
+        restantes = [i for i, resultado in enumerate(resultados) if resultado is None]
+        if restantes:
+            buscas = self._buscar_similares([perguntas[i] for i in restantes])
+            for i, busca in zip(restantes, buscas):
+                resultados[i] = busca
+        return resultados
+
+    def _buscar_similares(self, perguntas):
+        indice = self.indice
+        with metricas.etapa('preprocessamento'):
+            tokens = [self.preprocessor.tokens(pergunta) for pergunta in perguntas]
+        with metricas.etapa('sinonimos'):
+            perguntas_processadas = [' '.join(self.preprocessor.aplicar_sinonimos(t)) for t in tokens]
+        if self.busca_invertida:
+            with metricas.etapa('busca_invertida'):
+                return indice.mais_similares(perguntas_processadas, True)
+        with metricas.etapa('vetorizacao'):
+            consultas = indice.vetorizar(perguntas_processadas)
+        with metricas.etapa('similaridade'):
+            return indice.melhores(indice.pontuar(consultas))
+
+    def buscar_candidatos(self, processed_question, k=5):
+        return self.indice.top_k(processed_question, k)
+
+    def aplicar_fallback_sessao(self, titulo, score, contexto=None):
+        # Sem filme parecido o bastante, a pergunta é tomada como continuação
+        # da conversa ("e o ano?") e vale o último filme ainda na base.
+        if score < LIMITE_SIMILARIDADE:
+            metricas.contar('paa_fallbacks_total')
+            for last_film in reversed(contexto['filmes'] if contexto else []):
+                if self.kb.contem_titulo(last_film):
+                    metricas.contar('paa_ultimo_filme_total')
                     return last_film, 0.5
-                
-            return self.kb.filmes[most_similar_idx]['titulo'], score
-        except Exception as e:
-            print(f"Erro em find_most_similar: {str(e)}")
-            raise
+        return titulo, score
     
-    def identificar_tipo_pergunta(self, pergunta):
-        pergunta = pergunta.lower()
+    def aplicar_tipo_anterior(self, pergunta, question_type, contexto=None):
+        # "E do Logan?" não diz o que se quer saber: repete o último tipo.
+        if question_type == 'geral' and contexto and contexto['tipos'] and CONTINUACAO.match(normalizar(pergunta)):
+            return contexto['tipos'][-1]
+        return question_type
+    
+    # =============================================
+    #  RESPOSTAS (usadas pelo app.py e pelo responder_lote.py)
+    # =============================================
+    def resolver_perguntas(self, perguntas):
+        # (consulta estruturada, filme, score, tipo) de cada pergunta, sem o
+        # contexto da conversa; é o que o cache do app.py guarda.
+        buscas = self.find_most_similar_batch(perguntas)
+        tipos = self.identificar_tipos_lote(perguntas)
+        resultados = []
+        for pergunta, (titulo, score), tipo in zip(perguntas, buscas, tipos):
+            with metricas.etapa('consulta_estruturada'):
+                consulta = self.responder_consulta_estruturada(pergunta)
+            resultados.append((consulta, titulo, float(score), tipo))
+        return resultados
+    
+    def montar_resposta(self, pergunta, resultado, contexto=None):
+        # Com o contexto da conversa, perguntas sem filme ou sem tipo claros
+        # herdam os da pergunta anterior.
+        consulta, titulo, score, tipo = resultado
+        if consulta:
+            return dict(consulta, pergunta=pergunta)
+        titulo, score = self.aplicar_fallback_sessao(titulo, score, contexto)
+        tipo = self.aplicar_tipo_anterior(pergunta, tipo, contexto)
+        if score < LIMITE_SIMILARIDADE:
+            metricas.contar('paa_sem_resposta_total')
+            return {
+                'pergunta': pergunta,
+                'resposta': "Não tenho informações suficientes sobre esse filme.",
+                'score': float(score)
+            }
         
-        # Verifica correspondência com perguntas conhecidas
-        for tipo, perguntas in self.padroes_perguntas.items():
-            for pergunta_conhecida in perguntas:
-                if fuzz.ratio(pergunta, pergunta_conhecida.lower()) > 70:
-                    return tipo if tipo != 'geral' else self.identify_question_type(pergunta)
-                
-        return self.identify_question_type(pergunta)
+        filme = self.kb.get_filme(titulo)
+        if filme is None:
+            return {'pergunta': pergunta, 'resposta': "Filme não encontrado na base de dados."}
+        with metricas.etapa('resposta'):
+            resposta = self.gerar_resposta_avancada(filme, tipo)
+        return {
+            'pergunta': pergunta,
+            'resposta': resposta,
+            'filme': titulo,
+            'score': float(score),
+            'tipo': tipo
+        }
+    
+    def responder(self, perguntas):
+        # Perguntas independentes, sem conversa.
+        return [
+            self.montar_resposta(pergunta, resultado)
+            for pergunta, resultado in zip(perguntas, self.resolver_perguntas(perguntas))
+        ]
+    
+    # =============================================
+    #  ATUALIZAÇÃO DA BASE EM TEMPO DE EXECUÇÃO
+    # =============================================
+    def adicionar_filme(self, filme):
+        with self._lock_escrita:
+            # Os fragmentos do filme ficam prontos antes de a base publicá-lo.
+            filme = self.kb.adicionar_filme(filme, antes_de_publicar=self.fragmentos.atualizar)
+            self._atualizar_indice([filme], [])
+            return filme
+    
+    def atualizar_filme(self, titulo, filme):
+        with self._lock_escrita:
+            antiga = self.kb.indice_titulos.get(normalizar(titulo))
+            filme = self.kb.atualizar_filme(titulo, filme, antes_de_publicar=self.fragmentos.atualizar)
+            # A versão nova ocupa outra posição; a antiga não é mais lida.
+            self.fragmentos.remover(antiga)
+            self._atualizar_indice([filme], [titulo])
+            return filme
+    
+    def remover_filme(self, titulo):
+        with self._lock_escrita:
+            posicao = self.kb.indice_titulos.get(normalizar(titulo))
+            filme = self.kb.remover_filme(titulo)
+            self.fragmentos.remover(posicao)
+            self._atualizar_indice([], [titulo])
+            return filme
+    
+    def _atualizar_indice(self, novos, removidos):
+        linhas = [self._linhas_por_titulo.pop(normalizar(titulo)) for titulo in removidos]
+        documentos = [
+            (filme['titulo'], self.preprocessor.preprocess(self.kb.texto_documento(filme)))
+            for filme in novos
+        ]
+        indice = self.indice.com_alteracoes(documentos, linhas)
+        for i, filme in enumerate(novos):
+            self._linhas_por_titulo[normalizar(filme['titulo'])] = self.indice.n_linhas + i
+        if indice.precisa_compactar():
+            indice = indice.compactar()
+        if self.vinculador is not None:
+            for filme in novos:
+                self.vinculador.adicionar_filme(filme)
+        self.indice = indice
+        self.versao += 1
+    
+    def responder_consulta_estruturada(self, pergunta):
+        # Perguntas que listam filmes por ano, diretor, ator ou gênero são
+        # respondidas direto pelos índices invertidos, sem passar pelo TF-IDF.
+        match = CONSULTA_FILMES.search(normalizar(pergunta))
+        if not match:
+            return None
+        
+        chave = match.group('chave')
+        filtro = match.group('campo') or match.group('filtro') or ''
+        consultas = [
+            ('ano', self.kb.filmes_por_ano),
+            ('diretor', self.kb.filmes_por_diretor),
+            ('ator', self.kb.filmes_por_ator),
+            ('genero', lambda g: self.kb.filmes_por_genero(self.generos_pt.get(g, g)))
+        ]
+        if 'dirig' in filtro or 'diretor' in filtro:
+            consultas.sort(key=lambda c: c[0] != 'diretor')
+        elif 'estrel' in filtro or 'ator' in filtro or 'atriz' in filtro:
+            consultas.sort(key=lambda c: c[0] != 'ator')
+        elif 'genero' in filtro:
+            consultas.sort(key=lambda c: c[0] != 'genero')
+        
+        for tipo, consulta in consultas:
+            filmes = consulta(chave)
+            if filmes:
+                titulos = [filme['titulo'] for filme in filmes]
+                return {
+                    'pergunta': pergunta,
+                    'resposta': f"Encontrei {len(titulos)} filme(s): {', '.join(titulos)}.",
+                    'filmes': titulos,
+                    'tipo': tipo
+                }
+        return None
+    
+    def identificar_tipo_pergunta(self, pergunta):
+        return self.identificar_tipos_lote([pergunta])[0]
+    
+    def identificar_tipos_lote(self, perguntas):
+        with metricas.etapa('tipo'):
+            return self._identificar_tipos_lote(perguntas)
+    
+    def _identificar_tipos_lote(self, perguntas):
+        resultados = []
+        for pergunta, tipos in zip(perguntas, self.classificador.classificar_lote(perguntas)):
+            pergunta = pergunta.lower()
+            if not tipos or tipos == ['geral']:
+                resultados.append(self.identify_question_type(pergunta))
+            elif len(tipos) == 1:
+                resultados.append(tipos[0])
+            else:
+                resultados.append(self._ordenar_por_mencao(pergunta, tipos))
+        return resultados
+    
+    def _ordenar_por_mencao(self, pergunta, tipos):
+        # Mantém a ordem em que os tipos aparecem na pergunta
+        # ("Diretor e ano de Logan?" -> ['diretor', 'ano']).
+        def posicao(tipo):
+            match = re.search(self.padroes_tipo.get(tipo, r'$^'), pergunta)
+            return match.start() if match else len(pergunta)
+        return sorted(tipos, key=posicao)
     
     def identify_question_type(self, question):
         question = question.lower()
-        patterns = {
-            'diretor': r'diretor|dirigiu|realizador',
-            'ator': r'ator|atriz|elenco|estrela',
-            'genero': r'gênero|genero|tipo|estilo',
-            'ano': r'ano|lançamento|lançou',
-            'sinopse': r'sinopse|resumo|enredo'
-        }
-        for qtype, pattern in patterns.items():
+        for qtype, pattern in self.padroes_tipo.items():
             if re.search(pattern, question):
                 return qtype
         return 'geral'
     
     def gerar_resposta_avancada(self, filme, question_type):
-        templates = {
-            'diretor': [
-                f"O diretor de {filme['titulo']} é {', '.join(filme['diretor'])}.",
-                f"{filme['titulo']} foi dirigido por {', '.join(filme['diretor'])}."
-            ],
-            'ator': [
-                f"No elenco de {filme['titulo']} temos: {', '.join(filme['atores'])}.",
-                f"Os atores principais são {', '.join(filme['atores'])}."
-            ],
-            'genero': [
-                f"{filme['titulo']} é do gênero: {', '.join(filme['genero'])}.",
-                f"Classificado como: {', '.join(filme['genero'])}."
-            ],
-            'ano': [
-                f"Foi lançado em {filme['ano']}.",
-                f"Ano de lançamento: {filme['ano']}."
-            ]
-        }
-        
-        if isinstance(question_type, list):
-            respostas = []
-            for qt in question_type:
-                if qt in templates:
-                    respostas.append(random.choice(templates[qt]))
-                else:
-                    respostas.append(self.generate_answer(filme, qt))
-            return " ".join(respostas)
-        elif question_type in templates:
-            return random.choice(templates[question_type])
-        else:
-            return self.generate_answer(filme, question_type)
+        # Os textos vêm prontos de self.fragmentos (ver fragmentos.py).
+        return escolher(self._fragmentos(filme), question_type)
     
     def generate_answer(self, filme, question_type):
-        answers = {
-            'diretor': f"O diretor de {filme['titulo']} é {', '.join(filme['diretor'])}.",
-            'ator': f"Os atores principais de {filme['titulo']} são: {', '.join(filme['atores'])}.",
-            'genero': f"O gênero de {filme['titulo']} é: {', '.join(filme['genero'])}.",
-            'ano': f"O filme {filme['titulo']} foi lançado em {filme['ano']}.",
-            'geral': f"Sobre {filme['titulo']}: Diretor(es): {', '.join(filme['diretor'])}, Ano: {filme['ano']}, Gênero: {', '.join(filme['genero'])}",
-            'sinopse': f"A sinopse de {filme['titulo']} é: {filme['sinopse']}."
-        }
-        return answers.get(question_type, "Não consegui entender sua pergunta.")
+        return escolher_direta(self._fragmentos(filme), question_type)
+    
+    def _fragmentos(self, filme):
+        # obter(slot) do filme. Filmes fora da base (ou versões antigas) e
+        # posições ainda sem fragmentos têm os textos gerados na hora.
+        posicao = self.kb.indice_titulos.get(normalizar(filme['titulo']))
+        obter = None
+        if posicao is not None and self.kb.filmes[posicao] is filme:
+            obter = self.fragmentos.do_filme(posicao)
+        return obter or gerar_fragmentos(filme).__getitem__
 
 
+# "titulo" é o filme a que a pergunta se refere; o benchmark.py mede a
+# acurácia da busca contra ele.
 banco_de_perguntas = [
     # Perguntas sobre direção
-    {"pergunta": "Quem é o diretor de Iron Man?", "tipo": ["diretor"]},
-    {"pergunta": "Quem dirigiu The Avengers?", "tipo": ["diretor"]},
-    {"pergunta": "De quem foi a direção de The Dark Knight?", "tipo": ["diretor"]},
-    {"pergunta": "Qual o nome do diretor de Logan?", "tipo": ["diretor"]},
-    {"pergunta": "Quem fez a direção de Joker?", "tipo": ["diretor"]},
-    {"pergunta": "Diretor do filme Black Panther?", "tipo": ["diretor"]},
-    {"pergunta": "Quem está creditado como diretor em Alita: Battle Angel?", "tipo": ["diretor"]},
-    {"pergunta": "Quem realizou a direção de Guardians of the Galaxy?", "tipo": ["diretor"]},
-    {"pergunta": "Nome do diretor responsável por The Batman?", "tipo": ["diretor"]},
-    {"pergunta": "Quem comandou a direção de Scott Pilgrim vs. the World?", "tipo": ["diretor"]},
-    {"pergunta": "Quem assina a direção de Man of Steel?", "tipo": ["diretor"]},
-    {"pergunta": "Direção de Deadpool?", "tipo": ["diretor"]},
-    {"pergunta": "Quem esteve à frente da direção de Warcraft?", "tipo": ["diretor"]},
-    {"pergunta": "Quem dirigiu o filme X-Men?", "tipo": ["diretor"]},
-    {"pergunta": "Quem ficou responsável pela direção de Shazam!?", "tipo": ["diretor"]},
+    {"pergunta": "Quem é o diretor de Iron Man?", "tipo": ["diretor"], "titulo": "Iron Man"},
+    {"pergunta": "Quem dirigiu The Avengers?", "tipo": ["diretor"], "titulo": "The Avengers"},
+    {"pergunta": "De quem foi a direção de The Dark Knight?", "tipo": ["diretor"], "titulo": "The Dark Knight"},
+    {"pergunta": "Qual o nome do diretor de Logan?", "tipo": ["diretor"], "titulo": "Logan"},
+    {"pergunta": "Quem fez a direção de Joker?", "tipo": ["diretor"], "titulo": "Joker"},
+    {"pergunta": "Diretor do filme Black Panther?", "tipo": ["diretor"], "titulo": "Black Panther"},
+    {"pergunta": "Quem está creditado como diretor em Alita: Battle Angel?", "tipo": ["diretor"], "titulo": "Alita: Battle Angel"},
+    {"pergunta": "Quem realizou a direção de Guardians of the Galaxy?", "tipo": ["diretor"], "titulo": "Guardians of the Galaxy"},
+    {"pergunta": "Nome do diretor responsável por The Batman?", "tipo": ["diretor"], "titulo": "The Batman"},
+    {"pergunta": "Quem comandou a direção de Scott Pilgrim vs. the World?", "tipo": ["diretor"], "titulo": "Scott Pilgrim vs. the World"},
+    {"pergunta": "Quem assina a direção de Man of Steel?", "tipo": ["diretor"], "titulo": "Man of Steel"},
+    {"pergunta": "Direção de Deadpool?", "tipo": ["diretor"], "titulo": "Deadpool"},
+    {"pergunta": "Quem esteve à frente da direção de Warcraft?", "tipo": ["diretor"], "titulo": "Warcraft"},
+    {"pergunta": "Quem dirigiu o filme X-Men?", "tipo": ["diretor"], "titulo": "X-Men"},
+    {"pergunta": "Quem ficou responsável pela direção de Shazam!?", "tipo": ["diretor"], "titulo": "Shazam!"},
 
     # Perguntas sobre elenco
-    {"pergunta": "Quem são os atores principais de The Avengers?", "tipo": ["ator"]},
-    {"pergunta": "Qual o elenco de Guardians of the Galaxy?", "tipo": ["ator"]},
-    {"pergunta": "Quem atua em The Dark Knight?", "tipo": ["ator"]},
-    {"pergunta": "Atores principais de Suicide Squad (2016)?", "tipo": ["ator"]},
-    {"pergunta": "Quem está no elenco de Justice League?", "tipo": ["ator"]},
-    {"pergunta": "Protagonistas de Men in Black?", "tipo": ["ator"]},
-    {"pergunta": "Quem são os atores de X-Men?", "tipo": ["ator"]},
-    {"pergunta": "Elenco principal de The Batman?", "tipo": ["ator"]},
-    {"pergunta": "Quem faz o papel principal em Deadpool?", "tipo": ["ator"]},
-    {"pergunta": "Atores que participam de Black Panther?", "tipo": ["ator"]},
-    {"pergunta": "Quem está no elenco de The Incredibles (vozes originais)?", "tipo": ["ator"]},
-    {"pergunta": "Protagonistas de Shang-Chi and the Legend of the Ten Rings?", "tipo": ["ator"]},
-    {"pergunta": "Quem atua em Doctor Strange?", "tipo": ["ator"]},
-    {"pergunta": "Atores principais de Aquaman?", "tipo": ["ator"]},
-    {"pergunta": "Quem faz parte do elenco de Alita: Battle Angel?", "tipo": ["ator"]},
+    {"pergunta": "Quem são os atores principais de The Avengers?", "tipo": ["ator"], "titulo": "The Avengers"},
+    {"pergunta": "Qual o elenco de Guardians of the Galaxy?", "tipo": ["ator"], "titulo": "Guardians of the Galaxy"},
+    {"pergunta": "Quem atua em The Dark Knight?", "tipo": ["ator"], "titulo": "The Dark Knight"},
+    {"pergunta": "Atores principais de Suicide Squad (2016)?", "tipo": ["ator"], "titulo": "Suicide Squad"},
+    {"pergunta": "Quem está no elenco de Justice League?", "tipo": ["ator"], "titulo": "Justice League"},
+    {"pergunta": "Protagonistas de Men in Black?", "tipo": ["ator"], "titulo": "Men in Black"},
+    {"pergunta": "Quem são os atores de X-Men?", "tipo": ["ator"], "titulo": "X-Men"},
+    {"pergunta": "Elenco principal de The Batman?", "tipo": ["ator"], "titulo": "The Batman"},
+    {"pergunta": "Quem faz o papel principal em Deadpool?", "tipo": ["ator"], "titulo": "Deadpool"},
+    {"pergunta": "Atores que participam de Black Panther?", "tipo": ["ator"], "titulo": "Black Panther"},
+    {"pergunta": "Quem está no elenco de The Incredibles (vozes originais)?", "tipo": ["ator"], "titulo": "The Incredibles"},
+    {"pergunta": "Protagonistas de Shang-Chi and the Legend of the Ten Rings?", "tipo": ["ator"], "titulo": "Shang-Chi and the Legend of the Ten Rings"},
+    {"pergunta": "Quem atua em Doctor Strange?", "tipo": ["ator"], "titulo": "Doctor Strange"},
+    {"pergunta": "Atores principais de Aquaman?", "tipo": ["ator"], "titulo": "Aquaman"},
+    {"pergunta": "Quem faz parte do elenco de Alita: Battle Angel?", "tipo": ["ator"], "titulo": "Alita: Battle Angel"},
 
     # Perguntas sobre gênero
-    {"pergunta": "Qual o gênero do filme Logan?", "tipo": ["genero"]},
-    {"pergunta": "Que tipo de filme é The Mask?", "tipo": ["genero"]},
-    {"pergunta": "Gênero cinematográfico de Joker?", "tipo": ["genero"]},
-    {"pergunta": "Classificação por gênero de Scott Pilgrim vs. the World?", "tipo": ["genero"]},
-    {"pergunta": "Que estilo de filme é Blade?", "tipo": ["genero"]},
-    {"pergunta": "Gênero predominante em The Avengers?", "tipo": ["genero"]},
-    {"pergunta": "Tipo de filme: Shazam!?", "tipo": ["genero"]},
-    {"pergunta": "Qual a categoria de The Incredibles?", "tipo": ["genero"]},
-    {"pergunta": "Gênero principal de Doctor Strange?", "tipo": ["genero"]},
-    {"pergunta": "Que tipo de produção é Alita: Battle Angel?", "tipo": ["genero"]},
-    {"pergunta": "Classificação por gênero de The New Mutants?", "tipo": ["genero"]},
-    {"pergunta": "Gênero cinematográfico de Ready Player One?", "tipo": ["genero"]},
-    {"pergunta": "Que estilo de filme é Deadpool?", "tipo": ["genero"]},
-    {"pergunta": "Gênero de The Batman?", "tipo": ["genero"]},
-    {"pergunta": "Tipo de produção de Big Hero 6?", "tipo": ["genero"]},
+    {"pergunta": "Qual o gênero do filme Logan?", "tipo": ["genero"], "titulo": "Logan"},
+    {"pergunta": "Que tipo de filme é The Mask?", "tipo": ["genero"], "titulo": "The Mask"},
+    {"pergunta": "Gênero cinematográfico de Joker?", "tipo": ["genero"], "titulo": "Joker"},
+    {"pergunta": "Classificação por gênero de Scott Pilgrim vs. the World?", "tipo": ["genero"], "titulo": "Scott Pilgrim vs. the World"},
+    {"pergunta": "Que estilo de filme é Blade?", "tipo": ["genero"], "titulo": "Blade"},
+    {"pergunta": "Gênero predominante em The Avengers?", "tipo": ["genero"], "titulo": "The Avengers"},
+    {"pergunta": "Tipo de filme: Shazam!?", "tipo": ["genero"], "titulo": "Shazam!"},
+    {"pergunta": "Qual a categoria de The Incredibles?", "tipo": ["genero"], "titulo": "The Incredibles"},
+    {"pergunta": "Gênero principal de Doctor Strange?", "tipo": ["genero"], "titulo": "Doctor Strange"},
+    {"pergunta": "Que tipo de produção é Alita: Battle Angel?", "tipo": ["genero"], "titulo": "Alita: Battle Angel"},
+    {"pergunta": "Classificação por gênero de The New Mutants?", "tipo": ["genero"], "titulo": "The New Mutants"},
+    {"pergunta": "Gênero cinematográfico de Ready Player One?", "tipo": ["genero"], "titulo": "Ready Player One"},
+    {"pergunta": "Que estilo de filme é Deadpool?", "tipo": ["genero"], "titulo": "Deadpool"},
+    {"pergunta": "Gênero de The Batman?", "tipo": ["genero"], "titulo": "The Batman"},
+    {"pergunta": "Tipo de produção de Big Hero 6?", "tipo": ["genero"], "titulo": "Big Hero 6"},
 
     # Perguntas sobre ano
-    {"pergunta": "Em que ano foi lançado The Dark Knight?", "tipo": ["ano"]},
-    {"pergunta": "Ano de lançamento de Iron Man?", "tipo": ["ano"]},
-    {"pergunta": "Quando estreou The Avengers nos cinemas?", "tipo": ["ano"]},
-    {"pergunta": "Data de lançamento de Man of Steel?", "tipo": ["ano"]},
-    {"pergunta": "Em que ano saiu Black Panther?", "tipo": ["ano"]},
-    {"pergunta": "Ano de produção de X-Men?", "tipo": ["ano"]},
-    {"pergunta": "Quando foi lançado Guardians of the Galaxy?", "tipo": ["ano"]},
-    {"pergunta": "Em que ano chegou aos cinemas The Batman?", "tipo": ["ano"]},
-    {"pergunta": "Ano de estreia de Deadpool?", "tipo": ["ano"]},
-    {"pergunta": "Quando foi produzido o primeiro Blade?", "tipo": ["ano"]},
-    {"pergunta": "Data de lançamento de Joker?", "tipo": ["ano"]},
-    {"pergunta": "Em que ano foi feito The Mask?", "tipo": ["ano"]},
-    {"pergunta": "Ano de lançamento de Logan?", "tipo": ["ano"]},
-    {"pergunta": "Quando estreou Scott Pilgrim vs. the World?", "tipo": ["ano"]},
-    {"pergunta": "Em que ano foi lançado Alita: Battle Angel?", "tipo": ["ano"]},
+    {"pergunta": "Em que ano foi lançado The Dark Knight?", "tipo": ["ano"], "titulo": "The Dark Knight"},
+    {"pergunta": "Ano de lançamento de Iron Man?", "tipo": ["ano"], "titulo": "Iron Man"},
+    {"pergunta": "Quando estreou The Avengers nos cinemas?", "tipo": ["ano"], "titulo": "The Avengers"},
+    {"pergunta": "Data de lançamento de Man of Steel?", "tipo": ["ano"], "titulo": "Man of Steel"},
+    {"pergunta": "Em que ano saiu Black Panther?", "tipo": ["ano"], "titulo": "Black Panther"},
+    {"pergunta": "Ano de produção de X-Men?", "tipo": ["ano"], "titulo": "X-Men"},
+    {"pergunta": "Quando foi lançado Guardians of the Galaxy?", "tipo": ["ano"], "titulo": "Guardians of the Galaxy"},
+    {"pergunta": "Em que ano chegou aos cinemas The Batman?", "tipo": ["ano"], "titulo": "The Batman"},
+    {"pergunta": "Ano de estreia de Deadpool?", "tipo": ["ano"], "titulo": "Deadpool"},
+    {"pergunta": "Quando foi produzido o primeiro Blade?", "tipo": ["ano"], "titulo": "Blade"},
+    {"pergunta": "Data de lançamento de Joker?", "tipo": ["ano"], "titulo": "Joker"},
+    {"pergunta": "Em que ano foi feito The Mask?", "tipo": ["ano"], "titulo": "The Mask"},
+    {"pergunta": "Ano de lançamento de Logan?", "tipo": ["ano"], "titulo": "Logan"},
+    {"pergunta": "Quando estreou Scott Pilgrim vs. the World?", "tipo": ["ano"], "titulo": "Scott Pilgrim vs. the World"},
+    {"pergunta": "Em que ano foi lançado Alita: Battle Angel?", "tipo": ["ano"], "titulo": "Alita: Battle Angel"},
 
     # Perguntas compostas
-    {"pergunta": "Quem dirigiu e qual o ator principal de Iron Man?", "tipo": ["diretor", "ator"]},
-    {"pergunta": "Qual o gênero e ano de lançamento de The Dark Knight?", "tipo": ["genero", "ano"]},
-    {"pergunta": "Diretor e ano de Logan?", "tipo": ["diretor", "ano"]},
-    {"pergunta": "Atores e gênero de Guardians of the Galaxy?", "tipo": ["ator", "genero"]},
-    {"pergunta": "Me fale sobre o diretor e o ano de Joker", "tipo": ["diretor", "ano"]},
-    {"pergunta": "Quem são os atores e qual o gênero de The Batman?", "tipo": ["ator", "genero"]},
-    {"pergunta": "Ano e diretor de Man of Steel?", "tipo": ["ano", "diretor"]},
-    {"pergunta": "Gênero e atores principais de The Avengers?", "tipo": ["genero", "ator"]},
-    {"pergunta": "Quem dirigiu e quando foi lançado Black Panther?", "tipo": ["diretor", "ano"]},
-    {"pergunta": "Atores e ano de lançamento de Deadpool?", "tipo": ["ator", "ano"]},
-    {"pergunta": "Diretor e gênero de Doctor Strange?", "tipo": ["diretor", "genero"]},
-    {"pergunta": "Me informe o ano e os atores de X-Men?", "tipo": ["ano", "ator"]},
-    {"pergunta": "Qual o diretor e o gênero de The Mask?", "tipo": ["diretor", "genero"]},
-    {"pergunta": "Quando foi lançado e quem são os atores de Men in Black?", "tipo": ["ano", "ator"]},
-    {"pergunta": "Gênero e diretor de Alita: Battle Angel?", "tipo": ["genero", "diretor"]},
+    {"pergunta": "Quem dirigiu e qual o ator principal de Iron Man?", "tipo": ["diretor", "ator"], "titulo": "Iron Man"},
+    {"pergunta": "Qual o gênero e ano de lançamento de The Dark Knight?", "tipo": ["genero", "ano"], "titulo": "The Dark Knight"},
+    {"pergunta": "Diretor e ano de Logan?", "tipo": ["diretor", "ano"], "titulo": "Logan"},
+    {"pergunta": "Atores e gênero de Guardians of the Galaxy?", "tipo": ["ator", "genero"], "titulo": "Guardians of the Galaxy"},
+    {"pergunta": "Me fale sobre o diretor e o ano de Joker", "tipo": ["diretor", "ano"], "titulo": "Joker"},
+    {"pergunta": "Quem são os atores e qual o gênero de The Batman?", "tipo": ["ator", "genero"], "titulo": "The Batman"},
+    {"pergunta": "Ano e diretor de Man of Steel?", "tipo": ["ano", "diretor"], "titulo": "Man of Steel"},
+    {"pergunta": "Gênero e atores principais de The Avengers?", "tipo": ["genero", "ator"], "titulo": "The Avengers"},
+    {"pergunta": "Quem dirigiu e quando foi lançado Black Panther?", "tipo": ["diretor", "ano"], "titulo": "Black Panther"},
+    {"pergunta": "Atores e ano de lançamento de Deadpool?", "tipo": ["ator", "ano"], "titulo": "Deadpool"},
+    {"pergunta": "Diretor e gênero de Doctor Strange?", "tipo": ["diretor", "genero"], "titulo": "Doctor Strange"},
+    {"pergunta": "Me informe o ano e os atores de X-Men?", "tipo": ["ano", "ator"], "titulo": "X-Men"},
+    {"pergunta": "Qual o diretor e o gênero de The Mask?", "tipo": ["diretor", "genero"], "titulo": "The Mask"},
+    {"pergunta": "Quando foi lançado e quem são os atores de Men in Black?", "tipo": ["ano", "ator"], "titulo": "Men in Black"},
+    {"pergunta": "Gênero e diretor de Alita: Battle Angel?", "tipo": ["genero", "diretor"], "titulo": "Alita: Battle Angel"},
 
     # Perguntas gerais
-    {"pergunta": "Me fale sobre o filme The Avengers", "tipo": ["geral"]},
-    {"pergunta": "Dê-me informações sobre The Dark Knight", "tipo": ["geral"]},
-    {"pergunta": "Conte-me sobre Logan", "tipo": ["geral"]},
-    {"pergunta": "Resumo de Joker", "tipo": ["geral"]},
-    {"pergunta": "Detalhes sobre Black Panther", "tipo": ["geral"]},
-    {"pergunta": "Informações sobre Man of Steel", "tipo": ["geral"]},
-    {"pergunta": "O que sabe sobre Guardians of the Galaxy?", "tipo": ["geral"]},
-    {"pergunta": "Me dê detalhes de Iron Man", "tipo": ["geral"]},
-    {"pergunta": "Fale sobre The Batman", "tipo": ["geral"]},
-    {"pergunta": "Me informe sobre Deadpool", "tipo": ["geral"]},
-    {"pergunta": "Conte-me detalhes de Scott Pilgrim vs. the World", "tipo": ["geral"]},
-    {"pergunta": "Resumo de The Incredibles", "tipo": ["geral"]},
-    {"pergunta": "Dados sobre Alita: Battle Angel", "tipo": ["geral"]},
-    {"pergunta": "O que pode me dizer sobre Men in Black?", "tipo": ["geral"]},
-    {"pergunta": "Informações gerais de X-Men", "tipo": ["geral"]}
+    {"pergunta": "Me fale sobre o filme The Avengers", "tipo": ["geral"], "titulo": "The Avengers"},
+    {"pergunta": "Dê-me informações sobre The Dark Knight", "tipo": ["geral"], "titulo": "The Dark Knight"},
+    {"pergunta": "Conte-me sobre Logan", "tipo": ["geral"], "titulo": "Logan"},
+    {"pergunta": "Resumo de Joker", "tipo": ["geral"], "titulo": "Joker"},
+    {"pergunta": "Detalhes sobre Black Panther", "tipo": ["geral"], "titulo": "Black Panther"},
+    {"pergunta": "Informações sobre Man of Steel", "tipo": ["geral"], "titulo": "Man of Steel"},
+    {"pergunta": "O que sabe sobre Guardians of the Galaxy?", "tipo": ["geral"], "titulo": "Guardians of the Galaxy"},
+    {"pergunta": "Me dê detalhes de Iron Man", "tipo": ["geral"], "titulo": "Iron Man"},
+    {"pergunta": "Fale sobre The Batman", "tipo": ["geral"], "titulo": "The Batman"},
+    {"pergunta": "Me informe sobre Deadpool", "tipo": ["geral"], "titulo": "Deadpool"},
+    {"pergunta": "Conte-me detalhes de Scott Pilgrim vs. the World", "tipo": ["geral"], "titulo": "Scott Pilgrim vs. the World"},
+    {"pergunta": "Resumo de The Incredibles", "tipo": ["geral"], "titulo": "The Incredibles"},
+    {"pergunta": "Dados sobre Alita: Battle Angel", "tipo": ["geral"], "titulo": "Alita: Battle Angel"},
+    {"pergunta": "O que pode me dizer sobre Men in Black?", "tipo": ["geral"], "titulo": "Men in Black"},
+    {"pergunta": "Informações gerais de X-Men", "tipo": ["geral"], "titulo": "X-Men"}
 ]
@@ -0,0 +1,245 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+from collections import deque
+import numpy as np
+from knowledgebase import normalizar
+from index_store import hash_arquivo
+
+# Reconhecimento de títulos e pessoas citados na pergunta com um autômato
+# de Aho-Corasick sobre palavras normalizadas: uma passada pela pergunta
+# encontra todas as ocorrências, de qualquer tamanho. Quando a pergunta cita
+# um único filme da base, ele é a resposta e a busca TF-IDF é dispensada.
+
+# Tipos de saída de um estado (máscara de bits: um nome pode ser título e
+# pessoa ao mesmo tempo).
+TITULO, PESSOA = 1, 2
+
+# Muda quando o formato do artefato muda.
+VERSAO_ENTIDADES = 1
+
+class AutomatoAhoCorasick:
+    # Montado com dicionários e, em construir(), convertido em arrays: as
+    # transições viram chaves estado * n_palavras + palavra ordenadas (busca
+    # binária) e cada estado guarda a falha, a próxima saída, a profundidade
+    # e os tipos. A chave de uma ocorrência é o próprio trecho da pergunta,
+    # então nenhum texto além do vocabulário precisa ser guardado, e os
+    # arrays podem ser gravados e mapeados do disco como o índice.
+    ARRAYS = ('chaves', 'destinos', 'falha', 'proxima_saida', 'profundidade', 'tipos')
+
+    def __init__(self, palavras=None, **arrays):
+        self.palavras = palavras if palavras is not None else {}
+        for nome in self.ARRAYS:
+            setattr(self, nome, arrays.get(nome))
+        self._transicoes = {}
+        self._filhos = [[]]
+        self._tipos = [0]
+
+    def adicionar(self, palavras, tipo):
+        estado = 0
+        for palavra in palavras:
+            palavra = self.palavras.setdefault(palavra, len(self.palavras))
+            proximo = self._transicoes.get((estado, palavra))
+            if proximo is None:
+                proximo = len(self._tipos)
+                self._transicoes[(estado, palavra)] = proximo
+                self._tipos.append(0)
+                self._filhos.append([])
+                self._filhos[estado].append((palavra, proximo))
+            estado = proximo
+        self._tipos[estado] |= tipo
+
+    def construir(self):
+        n_estados = len(self._tipos)
+        falha = [0] * n_estados
+        proxima_saida = [0] * n_estados
+        profundidade = [0] * n_estados
+        fila = deque(filho for _, filho in self._filhos[0])
+        for filho in fila:
+            profundidade[filho] = 1
+        while fila:
+            estado = fila.popleft()
+            for palavra, filho in self._filhos[estado]:
+                fila.append(filho)
+                profundidade[filho] = profundidade[estado] + 1
+                f = falha[estado]
+                while f and (f, palavra) not in self._transicoes:
+                    f = falha[f]
+                f = self._transicoes.get((f, palavra), 0)
+                falha[filho] = f
+                proxima_saida[filho] = f if self._tipos[f] else proxima_saida[f]
+        n_palavras = len(self.palavras)
+        chaves = np.fromiter(
+            (estado * n_palavras + palavra for estado, palavra in self._transicoes),
+            dtype=np.int64, count=len(self._transicoes)
+        )
+        destinos = np.fromiter(self._transicoes.values(), dtype=np.int32, count=len(self._transicoes))
+        ordem = np.argsort(chaves, kind='stable')
+        self.chaves, self.destinos = chaves[ordem], destinos[ordem]
+        self.falha = np.asarray(falha, dtype=np.int32)
+        self.proxima_saida = np.asarray(proxima_saida, dtype=np.int32)
+        self.profundidade = np.asarray(profundidade, dtype=np.int32)
+        self.tipos = np.asarray(self._tipos, dtype=np.uint8)
+        self._transicoes = self._filhos = self._tipos = None
+        return self
+
+    def _transicao(self, estado, palavra):
+        chave = estado * len(self.palavras) + palavra
+        i = int(np.searchsorted(self.chaves, chave))
+        if i < len(self.chaves) and self.chaves[i] == chave:
+            return int(self.destinos[i])
+        return -1
+
+    def buscar(self, palavras):
+        # Devolve (início, fim, tipos) para cada ocorrência; fim exclusivo.
+        ocorrencias = []
+        estado = 0
+        for i, palavra in enumerate(palavras):
+            palavra = self.palavras.get(palavra)
+            if palavra is None:
+                # Palavra fora do vocabulário: nenhuma transição a partir
+                # de estado algum, volta para a raiz.
+                estado = 0
+                continue
+            proximo = self._transicao(estado, palavra)
+            while proximo < 0 and estado:
+                estado = int(self.falha[estado])
+                proximo = self._transicao(estado, palavra)
+            estado = max(proximo, 0)
+            saida = estado if self.tipos[estado] else int(self.proxima_saida[estado])
+            while saida:
+                ocorrencias.append((i + 1 - int(self.profundidade[saida]), i + 1, int(self.tipos[saida])))
+                saida = int(self.proxima_saida[saida])
+        return ocorrencias
+
+    def salvar(self, diretorio):
+        pai = os.path.dirname(os.path.abspath(diretorio))
+        os.makedirs(pai, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=pai, prefix='.tmp-entidades-')
+        try:
+            # O vocabulário em ordem de id: a posição na lista é o id.
+            with open(os.path.join(tmp, 'palavras.json'), 'w', encoding='utf-8') as f:
+                json.dump(sorted(self.palavras, key=self.palavras.get), f, ensure_ascii=False)
+            for nome in self.ARRAYS:
+                np.save(os.path.join(tmp, f'{nome}.npy'), getattr(self, nome))
+            os.rename(tmp, diretorio)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(diretorio):
+                raise
+
+    @classmethod
+    def carregar(cls, diretorio):
+        with open(os.path.join(diretorio, 'palavras.json'), encoding='utf-8') as f:
+            palavras = {palavra: i for i, palavra in enumerate(json.load(f))}
+        return cls(palavras, **{
+            # Vistas ndarray do mapeamento: indexar um np.memmap custa mais.
+            nome: np.asarray(np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r'))
+            for nome in cls.ARRAYS
+        })
+
+def palavras_ignoradas(preprocessor):
+    return {normalizar(palavra) for palavra in preprocessor.stopwords}
+
+def _palavras(chave, ignoradas):
+    # Títulos que são só palavras comuns da pergunta ("Up", "Her") não
+    # entram: ficam para a busca por similaridade.
+    palavras = tuple(chave.split())
+    if palavras and not all(palavra in ignoradas for palavra in palavras):
+        return palavras
+    return None
+
+def construir_automato(kb, ignoradas):
+    # Proporcional ao catálogo (alguns segundos com 100 mil filmes); com
+    # diretorio_indice, o EnhancedQAEngine carrega o autômato gravado por
+    # obter_automato e só paga isso quando a base muda.
+    automato = AutomatoAhoCorasick()
+    for indice, tipo in ((kb.indice_titulos, TITULO), (kb.indice_diretores, PESSOA), (kb.indice_atores, PESSOA)):
+        for chave in indice:
+            palavras = _palavras(chave, ignoradas)
+            if palavras:
+                automato.adicionar(palavras, tipo)
+    return automato.construir()
+
+def chave_automato(data_file, ignoradas):
+    ignoradas = hashlib.sha256(json.dumps(sorted(ignoradas)).encode('utf-8')).hexdigest()[:8]
+    return f"entidades-{VERSAO_ENTIDADES}-{ignoradas}-{hash_arquivo(data_file)[:16]}"
+
+def obter_automato(kb, ignoradas, diretorio_base='indice'):
+    # Como obter_fragmentos: um artefato por conteúdo da base (e palavras
+    # ignoradas), gerado só quando um dos dois muda.
+    chave = chave_automato(kb.data_file, ignoradas)
+    diretorio = os.path.join(diretorio_base, chave)
+    if not os.path.isdir(diretorio):
+        construir_automato(kb, ignoradas).salvar(diretorio)
+        for nome in os.listdir(diretorio_base):
+            if nome.startswith('entidades-') and nome != chave:
+                shutil.rmtree(os.path.join(diretorio_base, nome), ignore_errors=True)
+    return AutomatoAhoCorasick.carregar(diretorio)
+
+class VinculadorEntidades:
+    def __init__(self, kb, palavras_ignoradas=(), automato=None):
+        self.kb = kb
+        self.palavras_ignoradas = set(palavras_ignoradas)
+        self.automato = automato if automato is not None else construir_automato(kb, self.palavras_ignoradas)
+        # Filmes adicionados depois da construção (título e pessoas):
+        # procurados por n-gramas. O autômato não é reconstruído na
+        # compactação do índice; títulos removidos já são descartados em
+        # vincular() e o autômato novo só vem com a próxima carga da base.
+        self.extras = {}
+        self.max_extras = 0
+
+    def _adicionar_extra(self, chave, tipo):
+        palavras = _palavras(chave, self.palavras_ignoradas)
+        if palavras:
+            self.extras[palavras] = self.extras.get(palavras, 0) | tipo
+            self.max_extras = max(self.max_extras, len(palavras))
+
+    def adicionar_filme(self, filme):
+        self._adicionar_extra(normalizar(filme['titulo']), TITULO)
+        for nome in filme['diretor'] + filme['atores']:
+            self._adicionar_extra(normalizar(nome), PESSOA)
+
+    def ocorrencias(self, palavras):
+        ocorrencias = self.automato.buscar(palavras)
+        if self.extras:
+            for inicio in range(len(palavras)):
+                for fim in range(inicio + 1, min(len(palavras), inicio + self.max_extras) + 1):
+                    tipos = self.extras.get(tuple(palavras[inicio:fim]))
+                    if tipos:
+                        ocorrencias.append((inicio, fim, tipos))
+        # Só as ocorrências maximais: "shazam" dentro de "shazam fury of
+        # the gods" não conta como outra menção.
+        return [
+            (inicio, fim, tipos) for inicio, fim, tipos in ocorrencias
+            if not any(
+                i <= inicio and fim <= f and (i, f) != (inicio, fim)
+                for i, f, _ in ocorrencias
+            )
+        ]
+
+    def vincular(self, pergunta):
+        # Título do único filme citado na pergunta, ou None se nenhum ou
+        # mais de um (pessoas citadas ajudam a desempatar).
+        palavras = normalizar(pergunta).split()
+        titulos, pessoas = set(), set()
+        for inicio, fim, tipos in self.ocorrencias(palavras):
+            chave = ' '.join(palavras[inicio:fim])
+            if tipos & PESSOA:
+                pessoas.add(chave)
+            if tipos & TITULO and chave in self.kb.indice_titulos:
+                titulos.add(chave)
+        if len(titulos) > 1 and pessoas:
+            titulos = {
+                chave for chave in titulos
+                if pessoas & self._pessoas_do_filme(self.kb.indice_titulos[chave])
+            }
+        if len(titulos) != 1:
+            return None
+        return self.kb.filmes[self.kb.indice_titulos[titulos.pop()]]['titulo']
+
+    def _pessoas_do_filme(self, posicao):
+        filme = self.kb.filmes[posicao]
+        return {normalizar(nome) for nome in filme['diretor'] + filme['atores']}
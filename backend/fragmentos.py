@@ -0,0 +1,168 @@
+import os
+import json
+import random
+import shutil
+import hashlib
+import tempfile
+import numpy as np
+from index_store import hash_arquivo
+
+# Respostas prontas por filme. Os textos de cada tipo de pergunta (com os
+# ', '.join de diretores, atores e gêneros já feitos) são gerados uma vez,
+# quando a base é carregada ou um filme muda, e gravados junto do índice;
+# responder vira só escolher fragmentos.
+
+TEMPLATES = {
+    'diretor': [
+        "O diretor de {titulo} é {diretor}.",
+        "{titulo} foi dirigido por {diretor}."
+    ],
+    'ator': [
+        "No elenco de {titulo} temos: {atores}.",
+        "Os atores principais são {atores}."
+    ],
+    'genero': [
+        "{titulo} é do gênero: {genero}.",
+        "Classificado como: {genero}."
+    ],
+    'ano': [
+        "Foi lançado em {ano}.",
+        "Ano de lançamento: {ano}."
+    ]
+}
+
+# Usadas para os tipos sem variação acima (generate_answer).
+RESPOSTAS_DIRETAS = {
+    'diretor': "O diretor de {titulo} é {diretor}.",
+    'ator': "Os atores principais de {titulo} são: {atores}.",
+    'genero': "O gênero de {titulo} é: {genero}.",
+    'ano': "O filme {titulo} foi lançado em {ano}.",
+    'geral': "Sobre {titulo}: Diretor(es): {diretor}, Ano: {ano}, Gênero: {genero}",
+    'sinopse': "A sinopse de {titulo} é: {sinopse}."
+}
+
+RESPOSTA_DESCONHECIDA = "Não consegui entender sua pergunta."
+
+# Ordem dos fragmentos de cada filme: as variações de TEMPLATES e depois a
+# resposta direta de cada tipo.
+SLOTS, VARIACOES, DIRETAS = [], {}, {}
+for _tipo, _textos in TEMPLATES.items():
+    VARIACOES[_tipo] = list(range(len(SLOTS), len(SLOTS) + len(_textos)))
+    SLOTS.extend(_textos)
+for _tipo, _texto in RESPOSTAS_DIRETAS.items():
+    DIRETAS[_tipo] = len(SLOTS)
+    SLOTS.append(_texto)
+
+# Muda sozinha quando os textos mudam, invalidando os artefatos gravados.
+VERSAO_FRAGMENTOS = hashlib.sha256(json.dumps(SLOTS).encode('utf-8')).hexdigest()[:8]
+
+def campos(filme):
+    return {
+        'titulo': filme['titulo'],
+        'diretor': ', '.join(filme['diretor']),
+        'atores': ', '.join(filme['atores']),
+        'genero': ', '.join(filme['genero']),
+        'ano': filme['ano'],
+        'sinopse': filme['sinopse']
+    }
+
+def gerar_fragmentos(filme):
+    if filme is None:
+        return ('',) * len(SLOTS)
+    valores = campos(filme)
+    return tuple(texto.format(**valores) for texto in SLOTS)
+
+class Fragmentos:
+    # Os fragmentos de todos os filmes ficam concatenados em um único bloco
+    # UTF-8 (mapeado do disco, compartilhado entre workers); o fragmento j
+    # do filme i vai de offsets[i * len(SLOTS) + j] a offsets[... + 1].
+    # Filmes adicionados ou alterados depois da carga ficam em "extras",
+    # até serem removidos ou alterados de novo.
+    def __init__(self, dados, offsets):
+        self.dados = dados
+        self.offsets = offsets
+        self.n_filmes = (len(offsets) - 1) // len(SLOTS)
+        self.extras = {}
+
+    @classmethod
+    def construir(cls, kb):
+        blocos, offsets, total = [], [0], 0
+        for filme in kb.filmes:
+            for fragmento in gerar_fragmentos(filme):
+                bloco = fragmento.encode('utf-8')
+                blocos.append(bloco)
+                total += len(bloco)
+                offsets.append(total)
+        dados = np.frombuffer(b''.join(blocos), dtype=np.uint8)
+        return cls(dados, np.asarray(offsets, dtype=np.int64))
+
+    def salvar(self, diretorio):
+        pai = os.path.dirname(os.path.abspath(diretorio))
+        os.makedirs(pai, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=pai, prefix='.tmp-fragmentos-')
+        try:
+            np.save(os.path.join(tmp, 'dados.npy'), self.dados)
+            np.save(os.path.join(tmp, 'offsets.npy'), self.offsets)
+            os.rename(tmp, diretorio)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            if not os.path.isdir(diretorio):
+                raise
+
+    @classmethod
+    def carregar(cls, diretorio):
+        return cls(
+            np.load(os.path.join(diretorio, 'dados.npy'), mmap_mode='r'),
+            np.load(os.path.join(diretorio, 'offsets.npy'), mmap_mode='r')
+        )
+
+    def atualizar(self, posicao, filme):
+        self.extras[posicao] = gerar_fragmentos(filme)
+
+    def remover(self, posicao):
+        # Posição que deixou de ter filme (removido ou trocado por uma versão
+        # nova, que ganha outra posição); sem isso extras só cresceria.
+        self.extras.pop(posicao, None)
+
+    def do_filme(self, posicao):
+        # obter(slot) do filme na posição, ou None se ela não tem fragmentos.
+        # extras é consultado uma única vez: uma remoção concorrente não
+        # deixa o leitor no meio da resposta.
+        extras = self.extras.get(posicao)
+        if extras is not None:
+            return extras.__getitem__
+        if posicao >= self.n_filmes:
+            return None
+        inicio = posicao * len(SLOTS)
+        return lambda slot: bytes(
+            self.dados[self.offsets[inicio + slot]:self.offsets[inicio + slot + 1]]
+        ).decode('utf-8')
+
+# obter(slot) devolve o fragmento do filme; assim as mesmas regras servem
+# para a base e para fragmentos gerados na hora.
+def escolher(obter, question_type):
+    if isinstance(question_type, list):
+        return " ".join(escolher(obter, qt) for qt in question_type)
+    if question_type in VARIACOES:
+        return obter(random.choice(VARIACOES[question_type]))
+    return escolher_direta(obter, question_type)
+
+def escolher_direta(obter, question_type):
+    if question_type not in DIRETAS:
+        return RESPOSTA_DESCONHECIDA
+    return obter(DIRETAS[question_type])
+
+def chave_fragmentos(data_file):
+    return f"fragmentos-{VERSAO_FRAGMENTOS}-{hash_arquivo(data_file)[:16]}"
+
+def obter_fragmentos(kb, diretorio_base='indice'):
+    # Como obter_indice: um artefato por conteúdo da base (e versão dos
+    # textos), gerado só quando um dos dois muda.
+    chave = chave_fragmentos(kb.data_file)
+    diretorio = os.path.join(diretorio_base, chave)
+    if not os.path.isdir(diretorio):
+        Fragmentos.construir(kb).salvar(diretorio)
+        for nome in os.listdir(diretorio_base):
+            if nome.startswith('fragmentos-') and nome != chave:
+                shutil.rmtree(os.path.join(diretorio_base, nome), ignore_errors=True)
+    return Fragmentos.carregar(diretorio)
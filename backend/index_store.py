@@ -0,0 +1,428 @@
+import os
+import sys
+import copy
+import json
+import shutil
+import hashlib
+import tempfile
+from collections import Counter
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.preprocessing import normalize
+
+# Incrementar sempre que o pré-processamento ou o formato do índice mudar,
+# para que artefatos antigos não sejam reaproveitados.
+VERSAO_INDICE = 3
+
+def hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def chave_indice(data_file):
+    return f"v{VERSAO_INDICE}-{hash_arquivo(data_file)[:16]}"
+
+def calcular_idf(df, n_docs):
+    # Mesma fórmula do TfidfVectorizer (smooth_idf=True).
+    return np.log((1 + n_docs) / (1 + np.asarray(df, dtype=np.float64))) + 1
+
+def redimensionar(matriz, n_colunas):
+    return sparse.csr_matrix((matriz.data, matriz.indices, matriz.indptr), shape=(matriz.shape[0], n_colunas))
+
+# Snapshot imutável do índice TF-IDF. Alterações geram um novo snapshot
+# que reaproveita a matriz base: documentos novos vão para uma matriz
+# "delta" pequena, removidos viram uma máscara e as frequências de
+# documento alteradas ficam em um dicionário. Quem está respondendo uma
+# pergunta continua usando o snapshot que pegou, sem ver estado parcial.
+#
+# As linhas da base mantêm o IDF da época em que foram ponderadas; quando
+# as alterações acumuladas passam de uma fração da base, compactar()
+# repondera tudo com o IDF atual (sem pré-processar texto de novo).
+class IndiceTfidf:
+    analisador = TfidfVectorizer().build_analyzer()
+
+    def __init__(self, vocabulario, titulos, base, idf_base, df_base, n_docs):
+        # vocabulario e titulos só crescem e são compartilhados entre
+        # snapshots; cada snapshot só enxerga os primeiros n_termos/n_linhas.
+        self.vocabulario = vocabulario
+        self.n_termos = len(vocabulario)
+        self.titulos = titulos
+        self.n_linhas = base.shape[0]
+        self.base = base
+        self.idf_base = idf_base
+        self.df_base = df_base
+        self.n_docs = n_docs
+        self.delta = None
+        self.delta_tf = None
+        self.df_delta = {}
+        self.removidos = frozenset()
+        self.alteracoes = 0
+        self._postings = None
+
+    @classmethod
+    def construir(cls, kb, preprocessor):
+        # Os documentos passam pelo vetorizador em streaming; só os títulos
+        # são guardados no caminho.
+        titulos = []
+        def textos():
+            for titulo, doc in kb.documentos():
+                titulos.append(titulo)
+                yield preprocessor.preprocess(doc)
+        vectorizer = TfidfVectorizer()
+        matriz = vectorizer.fit_transform(textos()).tocsr()
+        vocabulario = dict(sorted(vectorizer.vocabulary_.items(), key=lambda item: item[1]))
+        df = np.bincount(matriz.indices, minlength=len(vocabulario))
+        return cls(vocabulario, titulos, matriz, vectorizer.idf_, df, matriz.shape[0])
+
+    def salvar(self, diretorio):
+        # Escreve em um diretório temporário e publica com rename, para que
+        # outro processo nunca encontre um índice pela metade.
+        indice = self.compactar() if self.alteracoes else self
+        pai = os.path.dirname(os.path.abspath(diretorio))
+        os.makedirs(pai, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=pai, prefix='.tmp-indice-')
+        try:
+            with open(os.path.join(tmp, 'vocabulario.json'), 'w', encoding='utf-8') as f:
+                json.dump(list(indice.vocabulario), f, ensure_ascii=False)
+            with open(os.path.join(tmp, 'titulos.json'), 'w', encoding='utf-8') as f:
+                json.dump(indice.titulos, f, ensure_ascii=False)
+            np.save(os.path.join(tmp, 'idf.npy'), indice.idf_base)
+            np.save(os.path.join(tmp, 'df.npy'), indice.df_base)
+            np.save(os.path.join(tmp, 'data.npy'), indice.base.data)
+            np.save(os.path.join(tmp, 'indices.npy'), indice.base.indices)
+            np.save(os.path.join(tmp, 'indptr.npy'), indice.base.indptr)
+            for nome, array in zip(('postings_indptr', 'postings_docs', 'postings_pesos', 'postings_max'), indice.postings()):
+                np.save(os.path.join(tmp, f'{nome}.npy'), array)
+            with open(os.path.join(tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+                json.dump({
+                    'versao': VERSAO_INDICE,
+                    'shape': list(indice.base.shape),
+                    'n_docs': indice.n_docs,
+                    'removidos': sorted(indice.removidos)
+                }, f)
+            os.rename(tmp, diretorio)
+        except OSError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            # Outro processo pode ter publicado o mesmo índice primeiro.
+            if not os.path.isdir(diretorio):
+                raise
+
+    @classmethod
+    def carregar(cls, diretorio):
+        with open(os.path.join(diretorio, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(os.path.join(diretorio, 'vocabulario.json'), encoding='utf-8') as f:
+            vocabulario = {termo: i for i, termo in enumerate(json.load(f))}
+        with open(os.path.join(diretorio, 'titulos.json'), encoding='utf-8') as f:
+            titulos = json.load(f)
+
+        # Os arrays da matriz são mapeados em memória: as páginas ficam no
+        # cache do sistema e são compartilhadas entre workers.
+        base = sparse.csr_matrix(
+            (
+                np.load(os.path.join(diretorio, 'data.npy'), mmap_mode='r'),
+                np.load(os.path.join(diretorio, 'indices.npy'), mmap_mode='r'),
+                np.load(os.path.join(diretorio, 'indptr.npy'), mmap_mode='r')
+            ),
+            shape=tuple(meta['shape']),
+            copy=False
+        )
+        indice = cls(
+            vocabulario,
+            titulos,
+            base,
+            np.load(os.path.join(diretorio, 'idf.npy'), mmap_mode='r'),
+            np.load(os.path.join(diretorio, 'df.npy'), mmap_mode='r'),
+            meta['n_docs']
+        )
+        indice.removidos = frozenset(meta['removidos'])
+        indice._postings = tuple(
+            np.load(os.path.join(diretorio, f'{nome}.npy'), mmap_mode='r')
+            for nome in ('postings_indptr', 'postings_docs', 'postings_pesos', 'postings_max')
+        )
+        return indice
+
+    # ---------------------------------------------
+    #  Consulta
+    # ---------------------------------------------
+    def df(self, termo):
+        if termo in self.df_delta:
+            return self.df_delta[termo]
+        return int(self.df_base[termo]) if termo < len(self.df_base) else 0
+
+    def _ponderar(self, contagem):
+        # tf * idf normalizado (L2), como o TfidfVectorizer; termos sem
+        # nenhum documento ativo são ignorados, como se não existissem.
+        termos, pesos = [], []
+        for termo, tf in contagem.items():
+            df = self.df(termo)
+            if df > 0:
+                termos.append(termo)
+                pesos.append(tf * calcular_idf(df, self.n_docs))
+        pesos = np.asarray(pesos, dtype=np.float64)
+        norma = np.linalg.norm(pesos)
+        return termos, pesos / norma if norma else pesos
+
+    def vetorizar(self, textos):
+        indptr, indices, data = [0], [], []
+        for texto in textos:
+            contagem = Counter()
+            for token in self.analisador(texto):
+                termo = self.vocabulario.get(token)
+                if termo is not None and termo < self.n_termos:
+                    contagem[termo] += 1
+            termos, pesos = self._ponderar(contagem)
+            indices.extend(termos)
+            data.extend(pesos)
+            indptr.append(len(indices))
+        return sparse.csr_matrix((data, indices, indptr), shape=(len(textos), self.n_termos))
+
+    def similaridades(self, textos):
+        return self.pontuar(self.vetorizar(textos))
+
+    def pontuar(self, consultas):
+        # As linhas são normalizadas (L2), então o produto escalar é o cosseno.
+        # A base fica à esquerda: base @ consultas.T percorre a matriz
+        # mapeada como está, enquanto consultas @ base.T faria uma cópia
+        # CSR da base inteira a cada chamada. Só o resultado é transposto.
+        scores = (self.base @ consultas[:, :self.base.shape[1]].T).T.toarray()
+        if self.delta is not None:
+            scores = np.hstack([scores, (self.delta @ consultas.T).T.toarray()])
+        if self.removidos:
+            scores[:, list(self.removidos)] = -1.0
+        return scores
+
+    def mais_similares(self, textos, invertido=False):
+        if invertido:
+            return [self._melhor_invertido(texto) for texto in textos]
+        return self.melhores(self.similaridades(textos))
+
+    def melhores(self, scores):
+        melhores = scores.argmax(axis=1)
+        return [
+            (self.titulos[idx], scores[i, idx])
+            for i, idx in enumerate(melhores)
+        ]
+
+    def _melhor_invertido(self, texto):
+        melhores = self.top_k(texto, 1)
+        if melhores:
+            return melhores[0]
+        # Nenhum termo em comum: mesmo resultado do argmax sobre zeros.
+        linha = next((i for i in range(self.n_linhas) if i not in self.removidos), 0)
+        return self.titulos[linha], 0.0
+
+    # ---------------------------------------------
+    #  Busca top-k por listas invertidas
+    # ---------------------------------------------
+    def postings(self):
+        # Lista invertida da base: para cada termo, documentos (ordenados)
+        # e pesos, mais o maior peso do termo, usado como limite superior.
+        if self._postings is None:
+            csc = self.base.tocsc()
+            csc.sort_indices()
+            maximos = np.asarray(csc.max(axis=0).todense()).ravel()
+            self._postings = (csc.indptr, csc.indices, csc.data, maximos)
+        return self._postings
+
+    def _removidos_array(self):
+        return np.fromiter(sorted(self.removidos), dtype=np.int64, count=len(self.removidos))
+
+    def top_k(self, texto, k=10):
+        # MaxScore: os termos são processados em ordem decrescente de
+        # contribuição máxima. Quando a soma dos limites dos termos restantes
+        # fica abaixo do k-ésimo melhor score parcial, nenhum documento novo
+        # pode entrar no top-k; os termos restantes só completam o score dos
+        # candidatos que ainda podem alcançá-lo. Os scores finais são os
+        # mesmos cossenos de similaridades(), só que sem percorrer a base.
+        if k < 1:
+            return []
+        consulta = self.vetorizar([texto])
+        removidos = self._removidos_array()
+        n_base = self.base.shape[0]
+
+        extras_linhas = np.empty(0, dtype=np.int64)
+        extras_scores = np.empty(0)
+        if self.delta is not None:
+            scores_delta = (self.delta @ consulta.T).toarray()[:, 0]
+            extras_linhas = np.nonzero(scores_delta > 0)[0] + n_base
+            extras_scores = scores_delta[extras_linhas - n_base]
+            ativos = ~np.isin(extras_linhas, removidos)
+            extras_linhas, extras_scores = extras_linhas[ativos], extras_scores[ativos]
+
+        indptr, docs, pesos, maximos = self.postings()
+        termos = [
+            (termo, peso, peso * maximos[termo])
+            for termo, peso in zip(consulta.indices, consulta.data)
+            if termo < self.base.shape[1] and indptr[termo + 1] > indptr[termo]
+        ]
+        termos.sort(key=lambda item: -item[2])
+        restante = np.cumsum([limite for _, _, limite in termos][::-1])[::-1]
+
+        def kesimo(candidatos):
+            todos = np.concatenate([extras_scores, candidatos])
+            return np.partition(todos, -k)[-k] if len(todos) >= k else 0.0
+
+        cand_docs = np.empty(0, dtype=np.int64)
+        cand_scores = np.empty(0)
+        limiar = kesimo(cand_scores)
+        i = 0
+        while i < len(termos) and restante[i] >= limiar:
+            termo, peso, _ = termos[i]
+            inicio, fim = indptr[termo], indptr[termo + 1]
+            if i == 0:
+                # A primeira lista já está ordenada e sem repetições.
+                cand_docs, cand_scores = np.asarray(docs[inicio:fim]), peso * pesos[inicio:fim]
+            else:
+                cand_docs, inverso = np.unique(np.concatenate([cand_docs, docs[inicio:fim]]), return_inverse=True)
+                cand_scores = np.bincount(
+                    inverso, weights=np.concatenate([cand_scores, peso * pesos[inicio:fim]]), minlength=len(cand_docs)
+                )
+            if removidos.size:
+                ativos = ~np.isin(cand_docs, removidos)
+                cand_docs, cand_scores = cand_docs[ativos], cand_scores[ativos]
+            limiar = kesimo(cand_scores)
+            i += 1
+
+        for j in range(i, len(termos)):
+            viaveis = cand_scores + restante[j] >= limiar
+            cand_docs, cand_scores = cand_docs[viaveis], cand_scores[viaveis]
+            termo, peso, _ = termos[j]
+            lista = docs[indptr[termo]:indptr[termo + 1]]
+            posicoes = np.searchsorted(lista, cand_docs)
+            encontrados = posicoes < len(lista)
+            encontrados[encontrados] = lista[posicoes[encontrados]] == cand_docs[encontrados]
+            cand_scores[encontrados] += peso * pesos[indptr[termo] + posicoes[encontrados]]
+            limiar = kesimo(cand_scores)
+
+        linhas = np.concatenate([cand_docs, extras_linhas])
+        scores = np.concatenate([cand_scores, extras_scores])
+        # Empates ficam com a menor linha, como no argmax.
+        ordem = np.lexsort((linhas, -scores))[:k]
+        return [(self.titulos[linhas[j]], float(scores[j])) for j in ordem if scores[j] > 0]
+
+    # ---------------------------------------------
+    #  Atualização incremental
+    # ---------------------------------------------
+    def _termos_da_linha(self, linha):
+        if linha < self.base.shape[0]:
+            return self.base.indices[self.base.indptr[linha]:self.base.indptr[linha + 1]]
+        linha -= self.base.shape[0]
+        return self.delta_tf.indices[self.delta_tf.indptr[linha]:self.delta_tf.indptr[linha + 1]]
+
+    def com_alteracoes(self, adicionar=(), remover=()):
+        # adicionar: [(titulo, texto_preprocessado)]; remover: [linha].
+        # O custo é proporcional ao tamanho dos documentos alterados.
+        novo = copy.copy(self)
+        novo.df_delta = dict(self.df_delta)
+        removidos = set(self.removidos)
+
+        for linha in remover:
+            if linha in removidos:
+                continue
+            for termo in self._termos_da_linha(linha):
+                novo.df_delta[int(termo)] = novo.df(int(termo)) - 1
+            removidos.add(linha)
+            novo.n_docs -= 1
+
+        contagens = []
+        for titulo, texto in adicionar:
+            contagem = Counter()
+            for token in self.analisador(texto):
+                termo = self.vocabulario.setdefault(token, len(self.vocabulario))
+                contagem[termo] += 1
+            for termo in contagem:
+                novo.df_delta[termo] = novo.df(termo) + 1
+            contagens.append(contagem)
+            novo.n_docs += 1
+        novo.n_termos = len(self.vocabulario)
+        novo.removidos = frozenset(removidos)
+        novo.alteracoes = self.alteracoes + len(remover) + len(adicionar)
+
+        if contagens:
+            linhas_tf = sparse.csr_matrix(
+                ([tf for c in contagens for tf in c.values()],
+                 [termo for c in contagens for termo in c],
+                 np.cumsum([0] + [len(c) for c in contagens])),
+                shape=(len(contagens), novo.n_termos)
+            )
+            ponderadas = [novo._ponderar(contagem) for contagem in contagens]
+            linhas = sparse.csr_matrix(
+                ([peso for _, pesos in ponderadas for peso in pesos],
+                 [termo for termos, _ in ponderadas for termo in termos],
+                 np.cumsum([0] + [len(termos) for termos, _ in ponderadas])),
+                shape=(len(contagens), novo.n_termos)
+            )
+            if self.delta is None:
+                novo.delta, novo.delta_tf = linhas, linhas_tf
+            else:
+                novo.delta = sparse.vstack([redimensionar(self.delta, novo.n_termos), linhas], format='csr')
+                novo.delta_tf = sparse.vstack([redimensionar(self.delta_tf, novo.n_termos), linhas_tf], format='csr')
+            # Títulos só crescem; snapshots antigos não enxergam as novas linhas.
+            self.titulos.extend(titulo for titulo, _ in adicionar)
+            novo.n_linhas = self.n_linhas + len(adicionar)
+        return novo
+
+    def precisa_compactar(self, fracao=0.1, minimo=50):
+        return self.alteracoes > max(minimo, fracao * self.base.shape[0])
+
+    def compactar(self):
+        # Reconstrói a base com o IDF atual a partir das frequências de
+        # termo guardadas. Linhas removidas ficam vazias para manter os ids.
+        base_tf = sparse.csr_matrix(
+            (self.base.data / np.asarray(self.idf_base)[self.base.indices], self.base.indices, self.base.indptr),
+            shape=(self.base.shape[0], self.n_termos)
+        )
+        if self.delta_tf is not None:
+            base_tf = sparse.vstack([base_tf, redimensionar(self.delta_tf, self.n_termos)], format='csr')
+        mascara = np.ones(base_tf.shape[0])
+        mascara[list(self.removidos)] = 0.0
+        base_tf = sparse.diags(mascara) @ base_tf
+
+        df = np.zeros(self.n_termos, dtype=np.int64)
+        df[:len(self.df_base)] = self.df_base
+        for termo, valor in self.df_delta.items():
+            df[termo] = valor
+        idf = calcular_idf(df, self.n_docs)
+
+        base = normalize(base_tf @ sparse.diags(idf), norm='l2', copy=False).tocsr()
+        base.eliminate_zeros()
+        novo = IndiceTfidf(self.vocabulario, self.titulos, base, idf, df, self.n_docs)
+        novo.n_termos = self.n_termos
+        novo.removidos = self.removidos
+        return novo
+
+def obter_indice(kb, preprocessor, diretorio_base='indice'):
+    # Carrega o índice do artefato correspondente ao conteúdo atual da base,
+    # construindo-o só quando a base mudou.
+    chave = chave_indice(kb.data_file)
+    diretorio = os.path.join(diretorio_base, chave)
+    if not os.path.isdir(diretorio):
+        IndiceTfidf.construir(kb, preprocessor).salvar(diretorio)
+        remover_indices_antigos(diretorio_base, manter=chave)
+    return IndiceTfidf.carregar(diretorio)
+
+def remover_indices_antigos(diretorio_base, manter):
+    # Processos que ainda mapeiam um índice removido continuam funcionando:
+    # o arquivo só deixa de existir quando o último mapeamento é fechado.
+    for nome in os.listdir(diretorio_base):
+        if nome != manter and nome.startswith('v'):
+            shutil.rmtree(os.path.join(diretorio_base, nome), ignore_errors=True)
+
+if __name__ == '__main__':
+    from knowledgebase import KnowledgeBase
+    from preprocessor import TextPreprocessor
+    from fragmentos import obter_fragmentos
+    from entidades import obter_automato, palavras_ignoradas
+
+    data_file = sys.argv[1] if len(sys.argv) > 1 else 'filmes.json'
+    diretorio_base = sys.argv[2] if len(sys.argv) > 2 else 'indice'
+    kb = KnowledgeBase(data_file)
+    preprocessor = TextPreprocessor()
+    obter_indice(kb, preprocessor, diretorio_base)
+    obter_fragmentos(kb, diretorio_base)
+    obter_automato(kb, palavras_ignoradas(preprocessor), diretorio_base)
+    print(f"Índice de {data_file} disponível em {os.path.join(diretorio_base, chave_indice(data_file))}.")
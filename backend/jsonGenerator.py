@@ -1,20 +1,72 @@
-import requests
+import os
+import re
 import json
+import argparse
+import hashlib
+import threading
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Mensagens de erro do requests trazem a URL da requisição, com a chave.
+CHAVE_NA_URL = re.compile(r'(apikey=)[^&\s\'"]+')
 
 class OMDBToJson:
-    def __init__(self, api_key):
-        self.api_key = "23361dd0"
-        self.base_url = "http://www.omdbapi.com/"
+    def __init__(self, api_key, base_url="http://www.omdbapi.com/", cache_dir='omdb_cache',
+                 max_workers=8, timeout=10, retries=3, backoff=0.5):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.cache_dir = cache_dir
+        self.max_workers = max_workers
+        self.timeout = timeout
+        # Uma sessão com pool de conexões compartilhada pelas threads, com
+        # novas tentativas e backoff exponencial para falhas transitórias.
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=max_workers,
+            pool_maxsize=max_workers,
+            max_retries=Retry(
+                total=retries,
+                backoff_factor=backoff,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=['GET']
+            )
+        )
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    def _caminho_cache(self, movie_title):
+        nome = hashlib.sha1(movie_title.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{nome}.json")
     
     def get_movie_data(self, movie_title):
+        if self.cache_dir and os.path.exists(self._caminho_cache(movie_title)):
+            with open(self._caminho_cache(movie_title), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
         params = {
             'apikey': self.api_key,
             't': movie_title,
             'type': 'movie',
             'r': 'json'
         }
-        response = requests.get(self.base_url, params=params)
-        return response.json()
+        response = self.session.get(self.base_url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        raw_data = response.json()
+        
+        # Só respostas definitivas vão para o cache; erros como limite de
+        # requisições devem ser tentados de novo na próxima execução.
+        if self.cache_dir and (raw_data.get('Response') == 'True' or raw_data.get('Error') == 'Movie not found!'):
+            caminho = self._caminho_cache(movie_title)
+            tmp = f"{caminho}.{threading.get_ident()}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(raw_data, f, ensure_ascii=False)
+            os.replace(tmp, caminho)
+        return raw_data
     
     def format_movie_data(self, raw_data):
         return {
@@ -27,25 +79,117 @@ class OMDBToJson:
         }
     
     def save_to_json(self, movies_data, filename='filmes.json'):
-        with open(filename, 'w', encoding='utf-8') as f:
+        tmp = f"{filename}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
             json.dump(movies_data, f, ensure_ascii=False, indent=4)
+        os.replace(tmp, filename)
     
-    def create_movies_json(self, movie_titles):
-        movies_data = []
-        
-        for title in movie_titles:
-            print(f"Obtendo dados para: {title}")
+    def _mensagem_erro(self, erro):
+        mensagem = CHAVE_NA_URL.sub(r'\1***', str(erro))
+        return mensagem.replace(self.api_key, '***') if self.api_key else mensagem
+    
+    def _buscar(self, title):
+        try:
             raw_data = self.get_movie_data(title)
-            
-            if raw_data.get('Response') == 'True':
-                formatted_data = self.format_movie_data(raw_data)
-                movies_data.append(formatted_data)
-                print(f"Dados obtidos com sucesso para: {title}")
-            else:
-                print(f"Erro ao obter dados para: {title} - {raw_data.get('Error', 'Erro desconhecido')}")
+        except (requests.RequestException, ValueError) as e:
+            return {'busca': title, 'erro': self._mensagem_erro(e), 'definitivo': False}
+        if raw_data.get('Response') == 'True':
+            return {'busca': title, 'filme': self.format_movie_data(raw_data)}
+        return {
+            'busca': title,
+            'erro': raw_data.get('Error', 'Erro desconhecido'),
+            'definitivo': raw_data.get('Error') == 'Movie not found!'
+        }
+    
+    def _ler_checkpoint(self, checkpoint):
+        # Título -> posição (em bytes) do seu registro no checkpoint; os
+        # registros ficam no disco e só são lidos de novo no fim.
+        concluidos = {}
+        if os.path.exists(checkpoint):
+            with open(checkpoint, 'rb') as f:
+                posicao, linha = 0, b''
+                for linha in f:
+                    try:
+                        registro = json.loads(linha)
+                    except ValueError:
+                        # Última linha cortada por uma interrupção.
+                        registro = {}
+                    if 'filme' in registro or registro.get('definitivo'):
+                        concluidos[registro['busca']] = posicao
+                    posicao += len(linha)
+                if linha and not linha.endswith(b'\n'):
+                    # Completa a linha cortada para o próximo registro não
+                    # ser gravado colado nela.
+                    with open(checkpoint, 'ab') as saida:
+                        saida.write(b'\n')
+        return concluidos
+    
+    def _salvar_do_checkpoint(self, movie_titles, concluidos, checkpoint, filename):
+        # Gera o mesmo JSON de save_to_json, um filme por vez e na ordem da
+        # lista de títulos, lendo cada registro do checkpoint.
+        tmp = f"{filename}.tmp"
+        total = 0
+        with open(checkpoint, 'rb') as registros, open(tmp, 'w', encoding='utf-8') as f:
+            for title in movie_titles:
+                if title not in concluidos:
+                    continue
+                registros.seek(concluidos[title])
+                registro = json.loads(registros.readline())
+                if 'filme' not in registro:
+                    continue
+                texto = json.dumps(registro['filme'], ensure_ascii=False, indent=4)
+                f.write(',\n' if total else '[\n')
+                f.write('\n'.join('    ' + linha for linha in texto.split('\n')))
+                total += 1
+            f.write('\n]' if total else '[]')
+        os.replace(tmp, filename)
+        return total
+    
+    def create_movies_json(self, movie_titles, filename='filmes.json'):
+        # Cada resultado é gravado no checkpoint (JSONL) assim que chega;
+        # uma nova execução pula os títulos já resolvidos e continua dali.
+        # Só alguns títulos ficam em andamento por vez e os filmes não são
+        # guardados em memória: o arquivo final é montado do checkpoint.
+        checkpoint = f"{filename}.parcial.jsonl"
+        movie_titles = list(dict.fromkeys(movie_titles))
+        concluidos = self._ler_checkpoint(checkpoint)
+        pendentes = iter([title for title in movie_titles if title not in concluidos])
+        if concluidos:
+            print(f"Retomando: {len(concluidos)} títulos já processados, "
+                  f"{len(movie_titles) - len(concluidos)} pendentes.")
+        
+        falhas = 0
+        with open(checkpoint, 'ab') as saida, \
+                ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            em_andamento = {
+                executor.submit(self._buscar, title)
+                for title in islice(pendentes, 4 * self.max_workers)
+            }
+            while em_andamento:
+                prontos, em_andamento = wait(em_andamento, return_when=FIRST_COMPLETED)
+                for futuro in prontos:
+                    registro = futuro.result()
+                    posicao = saida.tell()
+                    saida.write((json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8'))
+                    saida.flush()
+                    if 'filme' in registro:
+                        concluidos[registro['busca']] = posicao
+                        print(f"Dados obtidos com sucesso para: {registro['busca']}")
+                    else:
+                        if registro['definitivo']:
+                            concluidos[registro['busca']] = posicao
+                        else:
+                            falhas += 1
+                        print(f"Erro ao obter dados para: {registro['busca']} - {registro['erro']}")
+                    for title in islice(pendentes, 1):
+                        em_andamento.add(executor.submit(self._buscar, title))
         
-        self.save_to_json(movies_data)
-        print(f"Arquivo filmes.json criado com {len(movies_data)} filmes.")
+        total = self._salvar_do_checkpoint(movie_titles, concluidos, checkpoint, filename)
+        if falhas:
+            print(f"{falhas} títulos falharam; rode de novo para tentar apenas esses.")
+        else:
+            os.remove(checkpoint)
+        print(f"Arquivo {filename} criado com {total} filmes.")
 
 if __name__ == "__main__":
     API_KEY = "23361dd0"
@@ -73,5 +217,18 @@ if __name__ == "__main__":
         "Scott Pilgrim vs. the World", "R.I.P.D.", "Power Rangers (2017)","The Incredibles", "Big Hero 6", "Megamind",
     ]
     
-    omdb_to_json = OMDBToJson(API_KEY)
-    omdb_to_json.create_movies_json(filmes)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Gera o filmes.json a partir da API do OMDb.')
+    parser.add_argument('titulos', nargs='?', help='arquivo com um título por linha (padrão: lista embutida)')
+    parser.add_argument('--saida', default='filmes.json')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--cache', default='omdb_cache', help='diretório do cache de respostas')
+    parser.add_argument('--url', default=os.environ.get('OMDB_URL', 'http://www.omdbapi.com/'))
+    args = parser.parse_args()
+    
+    if args.titulos:
+        with open(args.titulos, 'r', encoding='utf-8') as f:
+            filmes = [linha.strip() for linha in f if linha.strip()]
+    
+    omdb_to_json = OMDBToJson(os.environ.get('OMDB_API_KEY', API_KEY), base_url=args.url,
+                              cache_dir=args.cache, max_workers=args.workers)
+    omdb_to_json.create_movies_json(filmes, args.saida)
\ No newline at end of file
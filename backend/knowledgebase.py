@@ -1,34 +1,278 @@
+import os
+import re
 import json
+from unidecode import unidecode
+
+PONTUACAO = re.compile(r'[^\w\s]')
+
+def normalizar(texto):
+    texto = PONTUACAO.sub('', unidecode(str(texto)).lower())
+    return ' '.join(texto.split())
+
+# =============================================
+#  CATÁLOGO
+# =============================================
+# Dois formatos: o filmes.json original (uma lista JSON) e JSONL, um filme
+# por linha, que é lido em streaming sem carregar o arquivo inteiro.
+def ler_catalogo(caminho):
+    with open(caminho, 'r', encoding='utf-8') as f:
+        if caminho.endswith('.jsonl'):
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        else:
+            yield from json.load(f)
+
+def salvar_jsonl(filmes, caminho):
+    tmp = f"{caminho}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        for filme in filmes:
+            if filme is not None:
+                f.write(json.dumps(dict(filme), ensure_ascii=False, separators=(',', ':')) + '\n')
+    os.replace(tmp, caminho)
+
+class TabelaNomes:
+    # Diretores, atores, gêneros e anos se repetem muito entre filmes; cada
+    # valor é guardado uma vez (com sua forma normalizada, usada pelos
+    # índices) e os filmes guardam só o id inteiro.
+    def __init__(self):
+        self.nomes = []
+        self.chaves = []
+        self.ids = {}
+    
+    def id_de(self, nome):
+        id_nome = self.ids.get(nome)
+        if id_nome is None:
+            id_nome = self.ids[nome] = len(self.nomes)
+            self.nomes.append(nome)
+            self.chaves.append(normalizar(nome))
+        return id_nome
+    
+    def ids_de(self, nomes):
+        try:
+            return tuple([self.ids[nome] for nome in nomes])
+        except KeyError:
+            return tuple(map(self.id_de, nomes))
+    
+    def nomes_de(self, ids):
+        return [self.nomes[id_nome] for id_nome in ids]
+
+class Filme:
+    # Registro compacto de um filme. Continua acessível como o dicionário de
+    # antes (filme['titulo'], filme.get('ano'), dict(filme)).
+    __slots__ = ('titulo', 'sinopse', '_ano', '_diretor', '_atores', '_genero', '_tabela')
+    CAMPOS = ('titulo', 'diretor', 'atores', 'genero', 'ano', 'sinopse')
+    
+    def __init__(self, tabela, titulo, diretor, atores, genero, ano, sinopse):
+        self._tabela = tabela
+        self.titulo = titulo
+        self._diretor = tabela.ids_de(diretor)
+        self._atores = tabela.ids_de(atores)
+        self._genero = tabela.ids_de(genero)
+        self._ano = tabela.id_de(ano)
+        self.sinopse = sinopse
+    
+    @property
+    def ano(self):
+        return self._tabela.nomes[self._ano]
+    
+    @property
+    def diretor(self):
+        return self._tabela.nomes_de(self._diretor)
+    
+    @property
+    def atores(self):
+        return self._tabela.nomes_de(self._atores)
+    
+    @property
+    def genero(self):
+        return self._tabela.nomes_de(self._genero)
+    
+    def __getitem__(self, chave):
+        if chave not in self.CAMPOS:
+            raise KeyError(chave)
+        return getattr(self, chave)
+    
+    def get(self, chave, padrao=None):
+        return getattr(self, chave) if chave in self.CAMPOS else padrao
+    
+    def __contains__(self, chave):
+        return chave in self.CAMPOS
+    
+    def keys(self):
+        return self.CAMPOS
+    
+    def __iter__(self):
+        return iter(self.CAMPOS)
+    
+    def como_dict(self):
+        return {campo: getattr(self, campo) for campo in self.CAMPOS}
+    
+    def __repr__(self):
+        return f"Filme({self.titulo!r}, {self.ano!r})"
 
 class KnowledgeBase:
     def __init__(self, data_file='filmes.json'):
         self.data_file = data_file
+        self.nomes = TabelaNomes()
         self.filmes = self.load_data()
-        self.corpus = self.build_corpus()
+        self.build_indices()
         
     def load_data(self):
         try:
-            with open(self.data_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return [self.criar_filme(filme) for filme in ler_catalogo(self.data_file)]
         except FileNotFoundError:
             print(f"Falha ao carregar a base de dados{self.data_file}.")
             return []
     
-    def build_corpus(self):
-        corpus = []
+    def criar_filme(self, dados):
+        return Filme(
+            self.nomes, dados['titulo'], dados['diretor'], dados['atores'], dados['genero'],
+            str(dados.get('ano', 'Desconhecido')), dados.get('sinopse', 'Sinopse não disponível')
+        )
+    
+    def documentos(self):
+        # O texto de cada documento é gerado sob demanda, sem manter uma
+        # segunda cópia da base em memória.
         for filme in self.filmes:
-            text_parts = [
-                filme['titulo'],
-                ' '.join(filme['diretor']),
-                ' '.join(filme['atores']),
-                str(filme['ano']),
-                ' '.join(filme['genero'])
-            ]
-            corpus.append(' '.join(text_parts))
-        return corpus
+            if filme is not None:
+                yield filme.titulo, self.texto_documento(filme)
+    
+    def texto_documento(self, filme):
+        text_parts = [
+            filme['titulo'],
+            ' '.join(filme['diretor']),
+            ' '.join(filme['atores']),
+            str(filme['ano']),
+            ' '.join(filme['genero'])
+        ]
+        return ' '.join(text_parts)
+    
+    def build_indices(self):
+        # Índice de títulos (título normalizado -> posição) e índices
+        # invertidos (diretor/ator/gênero/ano normalizado -> posições).
+        self.indice_titulos = {}
+        self.indice_diretores = {}
+        self.indice_atores = {}
+        self.indice_generos = {}
+        self.indice_anos = {}
+        for idx, filme in enumerate(self.filmes):
+            if filme is not None:
+                self._indexar(idx, filme)
+    
+    def _indexar(self, idx, filme):
+        chaves = self.nomes.chaves
+        self.indice_titulos.setdefault(normalizar(filme.titulo), idx)
+        for indice, ids in self._campos_indexados(filme):
+            for id_nome in ids:
+                indice.setdefault(chaves[id_nome], []).append(idx)
+    
+    def _campos_indexados(self, filme):
+        return (
+            (self.indice_diretores, filme._diretor),
+            (self.indice_atores, filme._atores),
+            (self.indice_generos, filme._genero),
+            (self.indice_anos, (filme._ano,))
+        )
+    
+    # ---------------------------------------------
+    #  Alterações em tempo de execução
+    # ---------------------------------------------
+    # Filmes removidos deixam a posição vazia (None) na lista, para que as
+    # posições usadas pelos índices continuem válidas. Os índices invertidos
+    # não são limpos na remoção (tirar uma posição de uma lista como a de
+    # "Drama" custaria o tamanho da lista): _consultar descarta as posições
+    # vazias, e posições nunca são reaproveitadas.
+    @staticmethod
+    def validar_filme(filme):
+        if not isinstance(filme, dict) or not str(filme.get('titulo', '')).strip():
+            raise ValueError('Campo "titulo" é obrigatório')
+        
+        def lista(valor):
+            if isinstance(valor, str):
+                return [parte.strip() for parte in valor.split(',') if parte.strip()]
+            return [str(parte) for parte in valor or []]
+        
+        return {
+            'titulo': str(filme['titulo']).strip(),
+            'diretor': lista(filme.get('diretor')),
+            'atores': lista(filme.get('atores')),
+            'genero': lista(filme.get('genero')),
+            'ano': str(filme.get('ano', 'Desconhecido')),
+            'sinopse': filme.get('sinopse', 'Sinopse não disponível')
+        }
+    
+    # antes_de_publicar(posicao, filme) roda antes de o filme ficar visível,
+    # para preparar o que depende da posição (ver EnhancedQAEngine).
+    def adicionar_filme(self, filme, antes_de_publicar=None):
+        filme = self.criar_filme(self.validar_filme(filme))
+        if self.contem_titulo(filme['titulo']):
+            raise ValueError(f"Filme já cadastrado: {filme['titulo']}")
+        idx = len(self.filmes)
+        if antes_de_publicar:
+            antes_de_publicar(idx, filme)
+        self.filmes.append(filme)
+        self._indexar(idx, filme)
+        return filme
+    
+    def atualizar_filme(self, titulo, filme, antes_de_publicar=None):
+        filme = self.criar_filme(self.validar_filme(filme))
+        antigo = self.indice_titulos.get(normalizar(titulo))
+        if antigo is None:
+            raise KeyError(titulo)
+        if normalizar(filme['titulo']) != normalizar(titulo) and self.contem_titulo(filme['titulo']):
+            raise ValueError(f"Filme já cadastrado: {filme['titulo']}")
+        
+        # A versão nova entra antes da antiga sair: quem consulta no meio da
+        # troca encontra uma das duas, nunca nenhuma.
+        idx = len(self.filmes)
+        if antes_de_publicar:
+            antes_de_publicar(idx, filme)
+        self.filmes.append(filme)
+        self._indexar(idx, filme)
+        self.indice_titulos[normalizar(filme['titulo'])] = idx
+        if normalizar(filme['titulo']) != normalizar(titulo):
+            del self.indice_titulos[normalizar(titulo)]
+        self._remover_posicao(antigo)
+        return filme
+    
+    def remover_filme(self, titulo):
+        idx = self.indice_titulos.pop(normalizar(titulo), None)
+        if idx is None:
+            raise KeyError(titulo)
+        filme = self.filmes[idx]
+        self._remover_posicao(idx)
+        return filme
+    
+    def _remover_posicao(self, idx):
+        self.filmes[idx] = None
     
     def get_filme(self, titulo):
-        for filme in self.filmes:
-            if filme['titulo'].lower() == titulo.lower():
-                return filme
-        return None
+        idx = self.indice_titulos.get(normalizar(titulo))
+        return self.filmes[idx] if idx is not None else None
+    
+    def contem_titulo(self, titulo):
+        return normalizar(titulo) in self.indice_titulos
+    
+    def _consultar(self, indice, chave):
+        filmes = (self.filmes[idx] for idx in indice.get(normalizar(chave), []))
+        return [filme for filme in filmes if filme is not None]
+    
+    def filmes_por_diretor(self, nome):
+        return self._consultar(self.indice_diretores, nome)
+    
+    def filmes_por_ator(self, nome):
+        return self._consultar(self.indice_atores, nome)
+    
+    def filmes_por_genero(self, genero):
+        return self._consultar(self.indice_generos, genero)
+    
+    def filmes_por_ano(self, ano):
+        return self._consultar(self.indice_anos, ano)
+
+if __name__ == '__main__':
+    # Converte um catálogo para JSONL: python knowledgebase.py filmes.json filmes.jsonl
+    import sys
+    origem, destino = sys.argv[1:3]
+    salvar_jsonl(ler_catalogo(origem), destino)
+    print(f"Catálogo {origem} convertido para {destino}.")
@@ -0,0 +1,181 @@
+import json
+import time
+import bisect
+import logging
+import threading
+
+# Métricas em processo, expostas em /metrics no formato texto do Prometheus.
+# Com o serve.py cada worker tem as suas: o Prometheus deve raspar cada
+# processo (o pid vai no /pronto) ou somar as séries.
+
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+DESCRICOES = {
+    'paa_etapa_segundos': 'Duração de cada etapa do motor de perguntas.',
+    'paa_requisicao_segundos': 'Duração total das requisições de perguntas.',
+    'paa_perguntas_total': 'Perguntas recebidas.',
+    'paa_fallbacks_total': 'Perguntas com score abaixo do limite de similaridade.',
+    'paa_ultimo_filme_total': 'Perguntas respondidas pelo último filme da sessão.',
+    'paa_sem_resposta_total': 'Perguntas sem filme suficientemente parecido.',
+    'paa_erros_total': 'Erros ao responder perguntas.',
+    'paa_lentas_total': 'Requisições acima do limite do log de consultas lentas.'
+}
+
+log_lentas = logging.getLogger('paa.lentas')
+
+class Histograma:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.contagens = [0] * (len(buckets) + 1)
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor):
+        self.contagens[bisect.bisect_left(self.buckets, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def linhas(self, nome, rotulos):
+        acumulado = 0
+        for limite, contagem in zip(self.buckets + ('+Inf',), self.contagens):
+            acumulado += contagem
+            yield f'{nome}_bucket{formatar_rotulos(rotulos + (("le", str(limite)),))} {acumulado}'
+        yield f'{nome}_sum{formatar_rotulos(rotulos)} {self.soma}'
+        yield f'{nome}_count{formatar_rotulos(rotulos)} {self.total}'
+
+def formatar_rotulos(rotulos):
+    if not rotulos:
+        return ''
+    partes = []
+    for chave, valor in rotulos:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        partes.append(f'{chave}="{valor}"')
+    return '{' + ','.join(partes) + '}'
+
+class _Nulo:
+    # Usado quando as métricas estão desligadas: um with que não faz nada.
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NULO = _Nulo()
+
+class _Cronometro:
+    __slots__ = ('metricas', 'nome', 'inicio')
+
+    def __init__(self, metricas, nome):
+        self.metricas = metricas
+        self.nome = nome
+
+    def __enter__(self):
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metricas.observar_etapa(self.nome, time.perf_counter() - self.inicio)
+        return False
+
+class _Requisicao:
+    # Na saída, duracao e etapas (nome -> segundos) ficam no objeto; o
+    # benchmark.py usa os mesmos cronômetros do motor.
+    __slots__ = ('metricas', 'descricao', 'inicio', 'duracao', 'etapas')
+
+    def __init__(self, metricas, descricao):
+        self.metricas = metricas
+        self.descricao = descricao
+
+    def __enter__(self):
+        self.metricas._local.etapas = {}
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.duracao = time.perf_counter() - self.inicio
+        self.etapas = self.metricas._local.etapas
+        self.metricas._local.etapas = None
+        self.metricas.fechar_requisicao(self.descricao, self.duracao, self.etapas)
+        return False
+
+class Metricas:
+    def __init__(self, ativo=True, limite_lenta_ms=500):
+        self.ativo = ativo
+        self.limite_lenta = limite_lenta_ms / 1000 if limite_lenta_ms else None
+        self._histogramas = {}
+        self._contadores = {}
+        self._lock = threading.Lock()
+        # Etapas da requisição em andamento nesta thread, para o log de
+        # consultas lentas.
+        self._local = threading.local()
+
+    def configurar(self, ativo=None, limite_lenta_ms=None):
+        if ativo is not None:
+            self.ativo = ativo
+        if limite_lenta_ms is not None:
+            self.limite_lenta = limite_lenta_ms / 1000 if limite_lenta_ms > 0 else None
+
+    def etapa(self, nome):
+        if not self.ativo:
+            return NULO
+        return _Cronometro(self, nome)
+
+    def requisicao(self, descricao):
+        if not self.ativo:
+            return NULO
+        return _Requisicao(self, descricao)
+
+    def contar(self, nome, n=1, **rotulos):
+        if not self.ativo:
+            return
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            self._contadores[chave] = self._contadores.get(chave, 0) + n
+
+    def observar(self, nome, valor, **rotulos):
+        chave = (nome, tuple(sorted(rotulos.items())))
+        with self._lock:
+            histograma = self._histogramas.get(chave)
+            if histograma is None:
+                histograma = self._histogramas[chave] = Histograma()
+            histograma.observar(valor)
+
+    def observar_etapa(self, nome, duracao):
+        self.observar('paa_etapa_segundos', duracao, etapa=nome)
+        etapas = getattr(self._local, 'etapas', None)
+        if etapas is not None:
+            etapas[nome] = etapas.get(nome, 0.0) + duracao
+
+    def fechar_requisicao(self, descricao, duracao, etapas):
+        self.observar('paa_requisicao_segundos', duracao)
+        if self.limite_lenta is not None and duracao >= self.limite_lenta:
+            self.contar('paa_lentas_total')
+            log_lentas.warning(json.dumps({
+                'pergunta': descricao,
+                'total_ms': round(duracao * 1000, 3),
+                'etapas_ms': {nome: round(valor * 1000, 3) for nome, valor in etapas.items()}
+            }, ensure_ascii=False))
+
+    def exportar(self, extras=()):
+        # extras: (nome, tipo, valor) calculados na hora, como os do cache.
+        with self._lock:
+            histogramas = sorted(self._histogramas.items(), key=lambda item: item[0])
+            contadores = sorted(self._contadores.items(), key=lambda item: item[0])
+        linhas = []
+        anterior = None
+        for (nome, rotulos), histograma in histogramas:
+            if nome != anterior:
+                linhas += [f'# HELP {nome} {DESCRICOES.get(nome, nome)}', f'# TYPE {nome} histogram']
+                anterior = nome
+            linhas.extend(histograma.linhas(nome, rotulos))
+        for (nome, rotulos), valor in contadores:
+            if nome != anterior:
+                linhas += [f'# HELP {nome} {DESCRICOES.get(nome, nome)}', f'# TYPE {nome} counter']
+                anterior = nome
+            linhas.append(f'{nome}{formatar_rotulos(rotulos)} {valor}')
+        for nome, tipo, valor in extras:
+            linhas += [f'# TYPE {nome} {tipo}', f'{nome} {valor}']
+        return '\n'.join(linhas) + '\n'
+
+# Instância do processo, usada pelo motor e pelas rotas.
+metricas = Metricas()
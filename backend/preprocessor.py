@@ -1,26 +1,89 @@
 import re
+from functools import lru_cache
 from nltk.tokenize import TreebankWordTokenizer
 from nltk.corpus import stopwords
 from nltk.stem import RSLPStemmer, PorterStemmer
 from unidecode import unidecode
 
+# Depois do unidecode o texto é ASCII, então remover pontuação e dígitos
+# em uma única passada dá o mesmo resultado das duas substituições antigas.
+CARACTERES_REMOVIDOS = re.compile(r'[^\w\s]|\d')
+
 class TextPreprocessor:
-    def __init__(self):
+    def __init__(self, cache_size=100000):
         self.tokenizer = TreebankWordTokenizer()
         self.stopwords = set(stopwords.words('english') + stopwords.words('portuguese'))
         self.stemmer_pt = RSLPStemmer()
         self.stemmer_en = PorterStemmer()
-        
-    def preprocess(self, text):
-        text = unidecode(text.lower())
-        text = re.sub(r'[^\w\s]', '', text)
-        text = re.sub(r'\d+', '', text)
-        tokens = self.tokenizer.tokenize(text)
-        processed_tokens = []
-        for token in tokens:
+        self.sinonimos = {}
+        self.max_sinonimo = 0
+        # palavra -> tupla de radicais; o texto limpo só contém \w e espaços,
+        # então tokenizar palavra a palavra equivale a tokenizar o texto todo.
+        self._normalizar_palavra = lru_cache(maxsize=cache_size)(self._processar_palavra)
+
+    def _processar_palavra(self, palavra):
+        radicais = []
+        for token in self.tokenizer.tokenize(palavra):
             if token not in self.stopwords:
                 try:
-                    processed_tokens.append(self.stemmer_pt.stem(token))
-                except:
-                    processed_tokens.append(self.stemmer_en.stem(token))
-        return ' '.join(processed_tokens)
\ No newline at end of file
+                    radicais.append(self.stemmer_pt.stem(token))
+                except Exception:
+                    radicais.append(self.stemmer_en.stem(token))
+        return tuple(radicais)
+
+    def tokens(self, text):
+        text = CARACTERES_REMOVIDOS.sub('', unidecode(text.lower()))
+        processed_tokens = []
+        for palavra in text.split():
+            processed_tokens.extend(self._normalizar_palavra(palavra))
+        return processed_tokens
+
+    def preprocess(self, text):
+        return ' '.join(self.tokens(text))
+
+    def definir_sinonimos(self, sinonimos):
+        # Os sinônimos passam pelo mesmo pipeline do texto, então o mapeamento
+        # é feito entre sequências de radicais, nunca dentro de palavras.
+        self.sinonimos = {}
+        for termo, lista_sinonimos in sinonimos.items():
+            radicais_termo = tuple(self.tokens(termo))
+            for sinonimo in lista_sinonimos:
+                radicais = tuple(self.tokens(sinonimo))
+                if radicais and radicais != radicais_termo:
+                    self.sinonimos.setdefault(radicais, radicais_termo)
+        self.max_sinonimo = max((len(chave) for chave in self.sinonimos), default=0)
+
+    def aplicar_sinonimos(self, tokens):
+        if not self.sinonimos:
+            return list(tokens)
+        resultado = []
+        i = 0
+        while i < len(tokens):
+            for tamanho in range(min(self.max_sinonimo, len(tokens) - i), 0, -1):
+                termo = self.sinonimos.get(tuple(tokens[i:i + tamanho]))
+                if termo is not None:
+                    resultado.extend(termo)
+                    i += tamanho
+                    break
+            else:
+                resultado.append(tokens[i])
+                i += 1
+        return resultado
+
+    def normalizar(self, text):
+        return ' '.join(self.aplicar_sinonimos(self.tokens(text)))
+
+    def aquecer(self, textos):
+        for text in textos:
+            self.tokens(text)
+
+    def estatisticas_cache(self):
+        info = self._normalizar_palavra.cache_info()
+        total = info.hits + info.misses
+        return {
+            'hits': info.hits,
+            'misses': info.misses,
+            'tamanho': info.currsize,
+            'capacidade': info.maxsize,
+            'taxa_acerto': info.hits / total if total else 0.0
+        }
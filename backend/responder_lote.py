@@ -0,0 +1,138 @@
+import os
+import gc
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+from collections import deque
+from itertools import islice
+from knowledgebase import KnowledgeBase
+from engine import EnhancedQAEngine
+from metricas import metricas
+
+# Responde perguntas offline, sem o Flask: lê JSONL (arquivo ou stdin), um
+# objeto por linha com "pergunta" (e opcionalmente "id", que é repetido na
+# saída), e escreve uma resposta JSONL por linha, na ordem da entrada.
+#
+#   python responder_lote.py perguntas.jsonl --saida respostas.jsonl --workers 8
+#   cat perguntas.jsonl | python responder_lote.py > respostas.jsonl
+#
+# As perguntas vão para os workers em blocos, com no máximo --janela blocos
+# em andamento: a memória usada não depende do tamanho da entrada. Cada
+# pergunta é independente (não há contexto de conversa entre linhas).
+
+_motor = None
+
+def carregar_motor(catalogo, diretorio_indice, busca_invertida=False):
+    global _motor
+    if _motor is None:
+        metricas.configurar(ativo=False)
+        _motor = EnhancedQAEngine(
+            KnowledgeBase(catalogo), diretorio_indice=diretorio_indice, busca_invertida=busca_invertida
+        )
+    return _motor
+
+def ler_linha(linha):
+    # Devolve (item, erro); o item vem sempre que a linha é um objeto JSON,
+    # para que o "id" volte mesmo nas linhas com erro.
+    try:
+        item = json.loads(linha)
+    except ValueError as e:
+        return None, f'JSON inválido: {e}'
+    if isinstance(item, str):
+        item = {'pergunta': item}
+    if not isinstance(item, dict):
+        return None, 'Campo "pergunta" é obrigatório'
+    if not isinstance(item.get('pergunta'), str):
+        return item, 'Campo "pergunta" é obrigatório'
+    return item, None
+
+def com_id(saida, item):
+    if item is not None and 'id' in item:
+        return dict(saida, id=item['id'])
+    return saida
+
+def responder_bloco(linhas):
+    # Roda no worker; devolve as linhas de saída já serializadas.
+    lidas = [ler_linha(linha) for linha in linhas]
+    validos = [item for item, erro in lidas if erro is None]
+    try:
+        respostas = iter(_motor.responder([item['pergunta'] for item in validos]))
+    except Exception as e:
+        respostas = iter([{'pergunta': item['pergunta'], 'erro': str(e)} for item in validos])
+    saidas = []
+    for item, erro in lidas:
+        saida = {'erro': erro} if erro else next(respostas)
+        saidas.append(json.dumps(com_id(saida, item), ensure_ascii=False))
+    return saidas
+
+def blocos(entrada, tamanho):
+    linhas = (linha for linha in entrada if linha.strip())
+    while True:
+        bloco = list(islice(linhas, tamanho))
+        if not bloco:
+            return
+        yield bloco
+
+def executar(entrada, saida, catalogo, diretorio_indice, n_workers, tamanho_bloco, janela, busca_invertida=False):
+    # O motor é carregado aqui, antes dos workers: com fork eles o herdam
+    # por copy-on-write (como no serve.py) e o initializer não faz nada.
+    carregar_motor(catalogo, diretorio_indice, busca_invertida)
+    total = 0
+    if n_workers <= 1:
+        for bloco in blocos(entrada, tamanho_bloco):
+            for linha in responder_bloco(bloco):
+                saida.write(linha + '\n')
+            total += len(bloco)
+        return total
+
+    gc.collect()
+    gc.freeze()
+    metodos = multiprocessing.get_all_start_methods()
+    contexto = multiprocessing.get_context('fork' if 'fork' in metodos else None)
+    with contexto.Pool(n_workers, initializer=carregar_motor, initargs=(catalogo, diretorio_indice, busca_invertida)) as pool:
+        # Pool.imap consumiria a entrada inteira de uma vez; com a janela,
+        # só os blocos em andamento ficam em memória.
+        pendentes = deque()
+        for bloco in blocos(entrada, tamanho_bloco):
+            pendentes.append(pool.apply_async(responder_bloco, (bloco,)))
+            total += len(bloco)
+            while len(pendentes) >= janela:
+                saida.writelines(linha + '\n' for linha in pendentes.popleft().get())
+        while pendentes:
+            saida.writelines(linha + '\n' for linha in pendentes.popleft().get())
+    return total
+
+def main():
+    parser = argparse.ArgumentParser(description='Responde perguntas em JSONL sem passar pelo servidor.')
+    parser.add_argument('entrada', nargs='?', default='-', help='arquivo JSONL de perguntas (padrão: stdin)')
+    parser.add_argument('--saida', default='-', help='arquivo JSONL de respostas (padrão: stdout)')
+    parser.add_argument('--catalogo', default=os.environ.get('CATALOGO', 'filmes.json'))
+    parser.add_argument('--indice', default='indice', help='diretório dos artefatos do índice')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--bloco', type=int, default=256, help='perguntas por tarefa enviada a um worker')
+    parser.add_argument('--janela', type=int, default=None, help='blocos em andamento (padrão: 2 por worker)')
+    parser.add_argument('--busca-invertida', action='store_true',
+                        default=os.environ.get('BUSCA_INVERTIDA', '0') == '1',
+                        help='busca top-k nas listas invertidas em vez de varrer a matriz')
+    args = parser.parse_args()
+
+    entrada = sys.stdin if args.entrada == '-' else open(args.entrada, 'r', encoding='utf-8')
+    saida = sys.stdout if args.saida == '-' else open(args.saida, 'w', encoding='utf-8')
+    inicio = time.perf_counter()
+    try:
+        total = executar(
+            entrada, saida, args.catalogo, args.indice, max(1, args.workers),
+            max(1, args.bloco), args.janela or 2 * max(1, args.workers), args.busca_invertida
+        )
+    finally:
+        if entrada is not sys.stdin:
+            entrada.close()
+        if saida is not sys.stdout:
+            saida.close()
+    duracao = time.perf_counter() - inicio
+    print(f"{total} perguntas em {duracao:.1f}s ({total / duracao:.0f}/s).", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
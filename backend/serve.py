@@ -0,0 +1,174 @@
+import os
+import gc
+import sys
+import time
+import errno
+import signal
+import socket
+import argparse
+import threading
+import nltk
+from werkzeug.serving import make_server
+
+# Servidor de produção pré-fork (Unix): o processo pai carrega a base, os
+# recursos do NLTK e o índice uma única vez e depois cria os workers com
+# fork. Os workers herdam tudo por copy-on-write e a matriz do índice, que
+# é mapeada do disco, fica compartilhada pelo cache de páginas.
+#
+#   SIGHUP          recarrega a base no pai e troca os workers sem derrubar
+#                   conexões (os antigos terminam a requisição em andamento)
+#   SIGTERM/SIGINT  encerra os workers e o pai
+
+RECURSOS_NLTK = ['corpora/stopwords', 'stemmers/rslp']
+
+def verificar_recursos_nltk():
+    faltando = []
+    for recurso in RECURSOS_NLTK:
+        try:
+            nltk.data.find(recurso)
+        except LookupError:
+            faltando.append(recurso.split('/')[-1])
+    if faltando:
+        sys.exit(f"Recursos do NLTK ausentes: {', '.join(faltando)}. "
+                 f"Instale com: python -m nltk.downloader {' '.join(faltando)}")
+
+def criar_socket(host, porta, backlog=1024):
+    sock = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, porta))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+def executar_worker(sock, host, porta, aplicacao):
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    servidor = make_server(host, porta, aplicacao.app, fd=sock.fileno())
+    # shutdown() espera o loop terminar, então não pode rodar no próprio
+    # handler do sinal (que executa na thread do loop).
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=servidor.shutdown).start())
+    servidor.serve_forever()
+    os._exit(0)
+
+class Mestre:
+    def __init__(self, sock, host, porta, n_workers, aplicacao):
+        self.sock = sock
+        self.host = host
+        self.porta = porta
+        self.n_workers = n_workers
+        self.aplicacao = aplicacao
+        self.workers = {}
+        self.geracao = 0
+        self.recarregar = False
+        self.encerrar = False
+
+    def criar_worker(self):
+        pid = os.fork()
+        if pid == 0:
+            try:
+                executar_worker(self.sock, self.host, self.porta, self.aplicacao)
+            finally:
+                os._exit(1)
+        self.workers[pid] = self.geracao
+
+    def congelar(self):
+        # Objetos carregados antes do fork saem do alcance do coletor de
+        # lixo, que de outra forma tocaria (e copiaria) suas páginas. No
+        # SIGHUP os objetos da geração anterior voltam para o coletor antes,
+        # senão ficariam presos na geração permanente.
+        gc.unfreeze()
+        gc.collect()
+        gc.freeze()
+
+    def coletar_filhos(self):
+        while True:
+            try:
+                pid, _ = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            geracao = self.workers.pop(pid, None)
+            if geracao == self.geracao and not self.encerrar:
+                print(f"Worker {pid} terminou inesperadamente; criando outro.", file=sys.stderr)
+                self.criar_worker()
+
+    def trocar_workers(self):
+        antigos = list(self.workers)
+        try:
+            self.aplicacao.inicializar()
+        except Exception as e:
+            # Base inválida (JSON quebrado, arquivo ausente...): a geração
+            # atual continua servindo até o próximo SIGHUP.
+            print(f"Falha ao recarregar a base ({type(e).__name__}: {e}); "
+                  f"mantendo os workers atuais.", file=sys.stderr)
+            return False
+        self.congelar()
+        self.geracao += 1
+        for _ in range(self.n_workers):
+            self.criar_worker()
+        for pid in antigos:
+            self.sinalizar(pid, signal.SIGTERM)
+        return True
+
+    def sinalizar(self, pid, sinal):
+        try:
+            os.kill(pid, sinal)
+        except OSError as e:
+            if e.errno != errno.ESRCH:
+                raise
+
+    def limpar_conversas(self):
+        # Os workers não limpam as conversas (ver main): com CONVERSAS=arquivo,
+        # o diretório é varrido só aqui.
+        try:
+            self.aplicacao.conversas.limpar_se_preciso()
+        except OSError as e:
+            print(f"Falha ao limpar as conversas ({e}).", file=sys.stderr)
+
+    def executar(self):
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, 'recarregar', True))
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, 'encerrar', True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, 'encerrar', True))
+
+        self.congelar()
+        for _ in range(self.n_workers):
+            self.criar_worker()
+        print(f"Servindo em http://{self.host}:{self.porta} com {self.n_workers} workers (pid {os.getpid()}).")
+
+        while not self.encerrar:
+            if self.recarregar:
+                self.recarregar = False
+                print("Recarregando a base de dados...")
+                self.trocar_workers()
+            self.coletar_filhos()
+            self.limpar_conversas()
+            time.sleep(0.5)
+
+        for pid in list(self.workers):
+            self.sinalizar(pid, signal.SIGTERM)
+        for pid in list(self.workers):
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+def main():
+    parser = argparse.ArgumentParser(description='Servidor de produção do projetoPAA.')
+    parser.add_argument('--host', default=os.environ.get('SERVE_HOST', '127.0.0.1'))
+    parser.add_argument('--porta', type=int, default=int(os.environ.get('SERVE_PORTA', 5000)))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('SERVE_WORKERS', os.cpu_count() or 1)))
+    args = parser.parse_args()
+
+    verificar_recursos_nltk()
+    import app as aplicacao
+    aplicacao.PRE_FORK = True
+    # Uma limpeza de conversas no processo principal, não uma por worker.
+    aplicacao.conversas.limpeza_automatica = False
+
+    sock = criar_socket(args.host, args.porta)
+    Mestre(sock, args.host, args.porta, max(1, args.workers), aplicacao).executar()
+
+if __name__ == '__main__':
+    main()
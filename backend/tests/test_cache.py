@@ -0,0 +1,85 @@
+import pytest
+from cache import CacheRespostas, chave_pergunta
+
+# Regras do cache de respostas, com um relógio falso no lugar do
+# time.monotonic: versões da base, expiração e descarte LRU.
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+@pytest.fixture
+def cache(relogio):
+    return CacheRespostas(capacidade=3, ttl=10, relogio=relogio)
+
+def test_chave_ignora_caixa_e_espacos():
+    assert chave_pergunta('  Quem   dirigiu LOGAN? ') == chave_pergunta('quem dirigiu logan?')
+
+def test_hit_e_miss(cache):
+    assert cache.obter('a', 1) is None
+    cache.guardar('a', 1, 'resposta')
+    assert cache.obter('a', 1) == 'resposta'
+    estatisticas = cache.estatisticas()
+    assert (estatisticas['hits'], estatisticas['misses'], estatisticas['tamanho']) == (1, 1, 1)
+    assert estatisticas['taxa_acerto'] == 0.5
+
+def test_versao_nova_esvazia(cache):
+    cache.guardar('a', 1, 'antiga')
+    cache.guardar('b', 1, 'antiga')
+    assert cache.obter('a', 2) is None
+    assert cache.estatisticas()['tamanho'] == 0
+    assert cache.versao == 2
+    # Também ao gravar: a primeira gravação da versão nova esvazia o resto.
+    cache.guardar('c', 2, 'nova')
+    cache.guardar('d', 3, 'mais nova')
+    assert cache.obter('c', 3) is None
+    assert cache.obter('d', 3) == 'mais nova'
+
+def test_versao_antiga_nao_le_nem_grava(cache):
+    cache.guardar('a', 2, 'atual')
+    # Um leitor com o índice desatualizado não vê o resultado atual...
+    assert cache.obter('a', 1) is None
+    # ...nem grava o seu, nem esvazia o cache.
+    cache.guardar('a', 1, 'desatualizada')
+    cache.guardar('b', 1, 'desatualizada')
+    assert cache.versao == 2
+    assert cache.obter('a', 2) == 'atual'
+    assert cache.obter('b', 2) is None
+
+def test_expiracao(cache, relogio):
+    cache.guardar('a', 1, 'resposta')
+    relogio.agora += 10
+    assert cache.obter('a', 1) == 'resposta'
+    relogio.agora += 0.001
+    assert cache.obter('a', 1) is None
+    # A entrada expirada sai do cache.
+    assert cache.estatisticas()['tamanho'] == 0
+
+def test_gravar_de_novo_renova_o_prazo(cache, relogio):
+    cache.guardar('a', 1, 'primeira')
+    relogio.agora += 8
+    cache.guardar('a', 1, 'segunda')
+    relogio.agora += 8
+    assert cache.obter('a', 1) == 'segunda'
+
+def test_descarta_o_menos_usado(cache):
+    for chave in 'abc':
+        cache.guardar(chave, 1, chave.upper())
+    # Ler "a" o torna o mais recente; "b" passa a ser o menos usado.
+    assert cache.obter('a', 1) == 'A'
+    cache.guardar('d', 1, 'D')
+    assert cache.estatisticas()['tamanho'] == 3
+    assert cache.obter('b', 1) is None
+    assert [cache.obter(chave, 1) for chave in 'acd'] == ['A', 'C', 'D']
+    # Regravar uma chave também a torna a mais recente.
+    cache.guardar('a', 1, 'A2')
+    cache.guardar('e', 1, 'E')
+    assert cache.obter('c', 1) is None
+    assert cache.obter('a', 1) == 'A2'
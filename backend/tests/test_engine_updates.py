@@ -0,0 +1,196 @@
+import json
+import numpy as np
+import pytest
+from knowledgebase import KnowledgeBase, normalizar
+from engine import EnhancedQAEngine
+from index_store import IndiceTfidf
+
+# Alterações da base em tempo de execução: o índice (com delta, removidos e
+# compactação), o mapa título -> linha do motor e as rotas /admin/filmes.
+
+NOMES = ['Alfa', 'Bravo', 'Charlie', 'Delta', 'Echo', 'Foxtrot', 'Golf', 'Hotel']
+
+def filme(nome, ano=2000):
+    return {
+        'titulo': f'Filme {nome}',
+        'diretor': [f'Diretor {nome}'],
+        'atores': [f'Ator {nome}', 'Ator Comum'],
+        'genero': ['Drama'],
+        'ano': str(ano),
+        'sinopse': f'Sinopse de {nome}.'
+    }
+
+@pytest.fixture
+def catalogo(tmp_path):
+    caminho = tmp_path / 'filmes.json'
+    caminho.write_text(json.dumps([filme(nome, 2000 + i) for i, nome in enumerate(NOMES)]), encoding='utf-8')
+    return str(caminho)
+
+@pytest.fixture
+def motor(catalogo):
+    return EnhancedQAEngine(KnowledgeBase(catalogo))
+
+def extra(i):
+    # Sem dígitos (o pré-processamento os remove) e sem vogais no fim, que
+    # o stemmer poderia cortar: Extra0 -> "Extrabk".
+    return 'Extra' + ''.join('bcdfghjlmn'[int(d)] for d in str(i)) + 'k'
+
+def conferir_linhas(motor):
+    # Cada filme da base aponta para a sua linha ativa no índice, e só ela.
+    indice = motor.indice
+    ativas = {
+        normalizar(indice.titulos[linha]): linha
+        for linha in range(indice.n_linhas) if linha not in indice.removidos
+    }
+    assert motor._linhas_por_titulo == ativas
+    assert set(ativas) == set(motor.kb.indice_titulos)
+
+def melhor_tfidf(motor, pergunta):
+    return motor._buscar_similares([pergunta])[0][0]
+
+def test_adicionar_filme(motor):
+    versao = motor.versao
+    motor.adicionar_filme(filme('India'))
+    assert motor.versao == versao + 1
+    assert melhor_tfidf(motor, 'Diretor India') == 'Filme India'
+    assert motor.vinculador.vincular('quem dirigiu Filme India?') == 'Filme India'
+    assert motor.responder(['Quem dirigiu Filme India?'])[0]['resposta'].count('Diretor India') == 1
+    conferir_linhas(motor)
+
+def test_atualizar_filme(motor):
+    motor.atualizar_filme('Filme Bravo', dict(filme('Bravo'), diretor=['Diretora Nova']))
+    assert motor.kb.get_filme('Filme Bravo')['diretor'] == ['Diretora Nova']
+    assert melhor_tfidf(motor, 'Diretora Nova') == 'Filme Bravo'
+    assert motor.responder(['Quem dirigiu Filme Bravo?'])[0]['resposta'].count('Diretora Nova') == 1
+    conferir_linhas(motor)
+
+def test_renomear_filme(motor):
+    motor.atualizar_filme('Filme Charlie', dict(filme('Charlie'), titulo='Filme Zulu'))
+    assert motor.kb.get_filme('Filme Charlie') is None
+    assert melhor_tfidf(motor, 'Diretor Charlie') == 'Filme Zulu'
+    assert motor.vinculador.vincular('Filme Charlie') is None
+    assert motor.vinculador.vincular('Filme Zulu') == 'Filme Zulu'
+    conferir_linhas(motor)
+
+def test_remover_filme(motor):
+    motor.remover_filme('Filme Delta')
+    assert motor.kb.get_filme('Filme Delta') is None
+    assert melhor_tfidf(motor, 'Diretor Delta Ator Delta') != 'Filme Delta'
+    assert motor.vinculador.vincular('Filme Delta') is None
+    conferir_linhas(motor)
+    with pytest.raises(KeyError):
+        motor.remover_filme('Filme Delta')
+
+def test_erros_nao_alteram_o_indice(motor):
+    indice, versao = motor.indice, motor.versao
+    with pytest.raises(ValueError):
+        motor.adicionar_filme(filme('Alfa'))
+    with pytest.raises(ValueError):
+        motor.atualizar_filme('Filme Alfa', filme('Bravo'))
+    with pytest.raises(KeyError):
+        motor.atualizar_filme('Filme Inexistente', filme('India'))
+    assert motor.indice is indice and motor.versao == versao
+    conferir_linhas(motor)
+
+def test_fragmentos_so_dos_filmes_atuais(motor):
+    motor.adicionar_filme(filme('India'))
+    for ano in range(2001, 2006):
+        motor.atualizar_filme('Filme India', filme('India', ano))
+    motor.atualizar_filme('Filme Alfa', dict(filme('Alfa'), diretor=['Diretora Nova']))
+    motor.remover_filme('Filme Bravo')
+    # Só as versões atuais de India e Alfa; Alfa continua na base mapeada,
+    # mas a posição antiga não é mais lida.
+    posicoes = {motor.kb.indice_titulos['filme india'], motor.kb.indice_titulos['filme alfa']}
+    assert set(motor.fragmentos.extras) == posicoes
+    assert motor.responder(['Qual o ano de lançamento de Filme India?'])[0]['resposta'].count('2005') == 1
+    assert motor.responder(['Quem dirigiu Filme Alfa?'])[0]['resposta'].count('Diretora Nova') == 1
+    motor.remover_filme('Filme India')
+    assert set(motor.fragmentos.extras) == {motor.kb.indice_titulos['filme alfa']}
+
+def alterar_varias_vezes(motor):
+    for i in range(40):
+        motor.adicionar_filme(filme(extra(i), 1990 + i % 7))
+    for i in range(0, 40, 3):
+        motor.remover_filme(f'Filme {extra(i)}')
+    for i in range(1, 40, 3):
+        motor.atualizar_filme(f'Filme {extra(i)}', dict(filme(extra(i)), genero=['Comedy', 'Drama']))
+    motor.atualizar_filme('Filme Echo', dict(filme('Echo'), titulo='Filme Echo Dois'))
+    motor.remover_filme('Filme Golf')
+
+def scores_por_titulo(indice, textos):
+    scores = indice.similaridades(textos)
+    return {
+        indice.titulos[linha]: scores[:, linha]
+        for linha in range(indice.n_linhas) if linha not in indice.removidos
+    }
+
+def test_compactar_igual_a_construir_do_zero(motor):
+    alterar_varias_vezes(motor)
+    assert motor.indice.delta is not None
+    compactado = motor.indice.compactar()
+    novo = IndiceTfidf.construir(motor.kb, motor.preprocessor)
+    # Perguntas só com termos de filmes ainda na base: termos dos removidos
+    # continuam no vocabulário do compactado (com df 0), mas não no do novo.
+    textos = [motor.preprocessor.preprocess(texto) for _, texto in motor.kb.documentos()]
+    obtido, esperado = scores_por_titulo(compactado, textos), scores_por_titulo(novo, textos)
+    assert obtido.keys() == esperado.keys()
+    for titulo in esperado:
+        assert np.allclose(obtido[titulo], esperado[titulo]), titulo
+
+def test_compactacao_automatica(motor):
+    alterar_varias_vezes(motor)
+    for i in range(40, 60):
+        motor.adicionar_filme(filme(extra(i)))
+    # Mais de 50 alterações: o motor trocou para um índice compactado no
+    # meio do caminho, com as linhas do delta já na base.
+    assert motor.indice.base.shape[0] > len(NOMES)
+    assert motor.indice.alteracoes < 50
+    conferir_linhas(motor)
+    assert melhor_tfidf(motor, f'Diretor {extra(59)}') == f'Filme {extra(59)}'
+    assert motor.vinculador.vincular(f'Filme {extra(59)} com Ator {extra(59)}') == f'Filme {extra(59)}'
+
+# =============================================
+#  /admin/filmes
+# =============================================
+@pytest.fixture
+def cliente(catalogo, tmp_path, monkeypatch):
+    # O app carrega o catálogo da variável CATALOGO ao ser importado; o
+    # motor de cada teste é trocado nos globais, como faz inicializar().
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('CATALOGO', catalogo)
+    monkeypatch.setenv('ADMIN_TOKEN', 'segredo')
+    import app
+    motor = EnhancedQAEngine(KnowledgeBase(catalogo))
+    monkeypatch.setattr(app, 'kb', motor.kb)
+    monkeypatch.setattr(app, 'qa_engine', motor)
+    monkeypatch.setattr(app, 'PRE_FORK', False)
+    return app.app.test_client()
+
+TOKEN = {'X-Admin-Token': 'segredo'}
+
+def test_admin_sem_token(cliente):
+    assert cliente.post('/admin/filmes', json=filme('India')).status_code == 403
+    assert cliente.post('/admin/filmes', json=filme('India'), headers={'X-Admin-Token': 'errado'}).status_code == 403
+    assert cliente.put('/admin/filmes/Filme Alfa', json=filme('Alfa')).status_code == 403
+    assert cliente.delete('/admin/filmes/Filme Alfa').status_code == 403
+
+def test_admin_pre_fork(cliente, monkeypatch):
+    import app
+    monkeypatch.setattr(app, 'PRE_FORK', True)
+    assert cliente.post('/admin/filmes', json=filme('India'), headers=TOKEN).status_code == 409
+    assert cliente.delete('/admin/filmes/Filme Alfa', headers=TOKEN).status_code == 409
+    assert app.kb.contem_titulo('Filme Alfa') and not app.kb.contem_titulo('Filme India')
+
+def test_admin_alteracoes(cliente):
+    resposta = cliente.post('/admin/filmes', json=filme('India'), headers=TOKEN)
+    assert resposta.status_code == 201
+    assert resposta.get_json()['filme']['titulo'] == 'Filme India'
+    assert cliente.put('/admin/filmes/Filme India', json=filme('India', 2024), headers=TOKEN).status_code == 200
+    assert cliente.delete('/admin/filmes/Filme India', headers=TOKEN).status_code == 200
+
+def test_admin_erros(cliente):
+    assert cliente.post('/admin/filmes', json={'diretor': 'Sem Titulo'}, headers=TOKEN).status_code == 400
+    assert cliente.post('/admin/filmes', json=filme('Alfa'), headers=TOKEN).status_code == 400
+    assert cliente.put('/admin/filmes/Filme Alfa', json=filme('Bravo'), headers=TOKEN).status_code == 400
+    assert cliente.put('/admin/filmes/Filme Inexistente', json=filme('India'), headers=TOKEN).status_code == 404
+    assert cliente.delete('/admin/filmes/Filme Inexistente', headers=TOKEN).status_code == 404
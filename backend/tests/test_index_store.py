@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+from benchmark import indice_sintetico, perguntas_sinteticas
+
+# top_k() tem que devolver o mesmo ranking que o cosseno calculado contra
+# todas as linhas, inclusive com linhas no delta e linhas removidas.
+
+def matriz_densa(indice):
+    matriz = np.zeros((indice.n_linhas, indice.n_termos))
+    inicio = 0
+    for bloco in (indice.base, indice.delta):
+        if bloco is not None:
+            matriz[inicio:inicio + bloco.shape[0], :bloco.shape[1]] = bloco.toarray()
+            inicio += bloco.shape[0]
+    return matriz
+
+def ranking_forca_bruta(indice, matriz, texto, k):
+    scores = matriz @ indice.vetorizar([texto]).toarray()[0]
+    ordem = sorted(
+        (linha for linha in range(indice.n_linhas) if linha not in indice.removidos and scores[linha] > 0),
+        key=lambda linha: (-scores[linha], linha)
+    )
+    return [(indice.titulos[linha], scores[linha]) for linha in ordem[:k]]
+
+def conferir(indice, perguntas, k):
+    matriz = matriz_densa(indice)
+    for pergunta in perguntas:
+        esperado = ranking_forca_bruta(indice, matriz, pergunta, k)
+        obtido = indice.top_k(pergunta, k)
+        assert [titulo for titulo, _ in obtido] == [titulo for titulo, _ in esperado], pergunta
+        assert np.allclose([score for _, score in obtido], [score for _, score in esperado])
+
+@pytest.fixture
+def indice():
+    return indice_sintetico(2000, n_termos=3000, termos_por_doc=8)
+
+@pytest.mark.parametrize('k', [1, 5, 50])
+def test_top_k_igual_a_forca_bruta(indice, k):
+    conferir(indice, perguntas_sinteticas(indice, 100), k)
+
+@pytest.mark.parametrize('k', [1, 10])
+def test_top_k_com_delta_e_removidos(indice, k):
+    perguntas = perguntas_sinteticas(indice, 100)
+    novos = [(f"novo {i}", pergunta + f" t{i} inedito{i % 3}") for i, pergunta in enumerate(perguntas[:30])]
+    indice = indice.com_alteracoes(novos, remover=list(range(0, 2000, 7)))
+    # Remove também linhas do delta e de documentos que eram a resposta.
+    melhores = {indice.top_k(pergunta, 1)[0][0] for pergunta in perguntas[30:60]}
+    remover = [linha for linha, titulo in enumerate(indice.titulos) if titulo in melhores]
+    indice = indice.com_alteracoes([], remover=remover + [2000, 2005, 2010])
+    conferir(indice, perguntas + [f"inedito{i}" for i in range(3)], k)
+
+def test_top_k_sem_termos_em_comum(indice):
+    assert indice.top_k("termo_que_nao_existe", 5) == []
+
+@pytest.mark.parametrize('k', [0, -3])
+def test_top_k_sem_candidatos_pedidos(indice, k):
+    assert indice.top_k(perguntas_sinteticas(indice, 1)[0], k) == []
@@ -0,0 +1,116 @@
+import json
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pytest
+from jsonGenerator import OMDBToJson
+
+# O gerador contra um servidor HTTP local que imita o OMDb:
+#   "Falha*"        responde 503 nas primeiras tentativas de cada título
+#   "Quebrado*"     responde 500 enquanto o servidor estiver "quebrado"
+#   "Inexistente*"  Movie not found! (resposta definitiva)
+
+class ServidorFalso:
+    def __init__(self, falhas_por_titulo=1):
+        self.chamadas = {}
+        self.falhas_por_titulo = falhas_por_titulo
+        self.quebrado = True
+        self.lock = threading.Lock()
+
+    def responder(self, titulo):
+        with self.lock:
+            self.chamadas[titulo] = self.chamadas.get(titulo, 0) + 1
+            chamadas = self.chamadas[titulo]
+        if titulo.startswith('Falha') and chamadas <= self.falhas_por_titulo:
+            return 503, None
+        if titulo.startswith('Quebrado') and self.quebrado:
+            return 500, None
+        if titulo.startswith('Inexistente'):
+            return 200, {'Response': 'False', 'Error': 'Movie not found!'}
+        return 200, {
+            'Response': 'True', 'Title': titulo, 'Director': 'Diretor A, Diretor B',
+            'Actors': 'Ator', 'Genre': 'Drama', 'Year': '2000', 'Plot': 'Enredo.'
+        }
+
+@pytest.fixture
+def omdb():
+    falso = ServidorFalso()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parametros = parse_qs(urlparse(self.path).query)
+            assert parametros['apikey'] == ['segredo']
+            status, corpo = falso.responder(parametros['t'][0])
+            dados = json.dumps(corpo).encode('utf-8') if corpo else b''
+            self.send_response(status)
+            self.send_header('Content-Length', str(len(dados)))
+            self.end_headers()
+            self.wfile.write(dados)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    falso.url = f"http://127.0.0.1:{servidor.server_address[1]}/"
+    yield falso
+    servidor.shutdown()
+    servidor.server_close()
+
+def gerador(omdb, tmp_path, **kwargs):
+    kwargs.setdefault('cache_dir', str(tmp_path / 'cache'))
+    return OMDBToJson('segredo', base_url=omdb.url, max_workers=4, backoff=0, **kwargs)
+
+def test_novas_tentativas_e_ordem(omdb, tmp_path):
+    titulos = [f"Filme {i}" for i in range(20)] + ['Falha 1', 'Inexistente 1', 'Falha 2', 'Filme 0']
+    saida = tmp_path / 'filmes.json'
+    gerador(omdb, tmp_path).create_movies_json(titulos, str(saida))
+
+    filmes = json.loads(saida.read_text(encoding='utf-8'))
+    assert [filme['titulo'] for filme in filmes] == [f"Filme {i}" for i in range(20)] + ['Falha 1', 'Falha 2']
+    assert filmes[0]['diretor'] == ['Diretor A', 'Diretor B']
+    assert omdb.chamadas['Falha 1'] == 2
+    assert not (tmp_path / 'filmes.json.parcial.jsonl').exists()
+
+    # Mesmo formato de save_to_json.
+    copia = tmp_path / 'copia.json'
+    gerador(omdb, tmp_path).save_to_json(filmes, str(copia))
+    assert saida.read_text(encoding='utf-8') == copia.read_text(encoding='utf-8')
+
+def test_cache_evita_novas_requisicoes(omdb, tmp_path):
+    titulos = ['Filme A', 'Inexistente B']
+    gerador(omdb, tmp_path).create_movies_json(titulos, str(tmp_path / 'um.json'))
+    gerador(omdb, tmp_path).create_movies_json(titulos, str(tmp_path / 'dois.json'))
+    assert omdb.chamadas == {'Filme A': 1, 'Inexistente B': 1}
+
+def test_retoma_so_as_falhas(omdb, tmp_path):
+    titulos = ['Filme A', 'Quebrado B', 'Filme C']
+    saida = tmp_path / 'filmes.json'
+    checkpoint = tmp_path / 'filmes.json.parcial.jsonl'
+    gerador(omdb, tmp_path, cache_dir=None, retries=1).create_movies_json(titulos, str(saida))
+
+    assert [filme['titulo'] for filme in json.loads(saida.read_text(encoding='utf-8'))] == ['Filme A', 'Filme C']
+    registros = checkpoint.read_text(encoding='utf-8')
+    assert 'Quebrado B' in registros
+    assert 'segredo' not in registros
+
+    omdb.quebrado = False
+    antes = dict(omdb.chamadas)
+    gerador(omdb, tmp_path, cache_dir=None).create_movies_json(titulos, str(saida))
+    assert [filme['titulo'] for filme in json.loads(saida.read_text(encoding='utf-8'))] == titulos
+    assert omdb.chamadas['Filme A'] == antes['Filme A']
+    assert omdb.chamadas['Quebrado B'] == antes['Quebrado B'] + 1
+    assert not checkpoint.exists()
+
+def test_retoma_checkpoint_cortado(omdb, tmp_path):
+    # Uma interrupção no meio da escrita deixa a última linha pela metade.
+    saida = tmp_path / 'filmes.json'
+    registro = {'busca': 'Filme A', 'filme': {'titulo': 'Filme A', 'diretor': [], 'atores': [],
+                                               'genero': [], 'ano': '1999', 'sinopse': ''}}
+    (tmp_path / 'filmes.json.parcial.jsonl').write_text(
+        json.dumps(registro) + '\n{"busca": "Filme B", "fil', encoding='utf-8'
+    )
+    gerador(omdb, tmp_path).create_movies_json(['Filme A', 'Filme B'], str(saida))
+    filmes = json.loads(saida.read_text(encoding='utf-8'))
+    assert [filme['ano'] for filme in filmes] == ['1999', '2000']
+    assert 'Filme A' not in omdb.chamadas
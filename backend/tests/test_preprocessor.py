@@ -0,0 +1,53 @@
+import os
+import re
+import pytest
+from nltk.tokenize import TreebankWordTokenizer
+from unidecode import unidecode
+from knowledgebase import KnowledgeBase
+from preprocessor import TextPreprocessor
+from engine import banco_de_perguntas
+
+# preprocess() com o cache de radicais por palavra tem que dar o mesmo
+# texto do pipeline original, que tokenizava e fazia o stemming do texto
+# inteiro a cada chamada.
+
+CATALOGO = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'filmes.json')
+
+def preprocess_original(preprocessor, text):
+    text = unidecode(text.lower())
+    text = re.sub(r'[^\w\s]', '', text)
+    text = re.sub(r'\d+', '', text)
+    processed_tokens = []
+    for token in TreebankWordTokenizer().tokenize(text):
+        if token not in preprocessor.stopwords:
+            try:
+                processed_tokens.append(preprocessor.stemmer_pt.stem(token))
+            except Exception:
+                processed_tokens.append(preprocessor.stemmer_en.stem(token))
+    return ' '.join(processed_tokens)
+
+def textos():
+    kb = KnowledgeBase(CATALOGO)
+    yield from (texto for _, texto in kb.documentos())
+    yield from (filme['sinopse'] for filme in kb.filmes)
+    yield from (item['pergunta'] for item in banco_de_perguntas)
+    yield from [
+        '', '   ', "Spider-Man: No Way Home (2021)", "O'Brien's 3rd film!!", 'Ação, aventura & ficção científica',
+        'quem dirigiu    o  filme?', 'R2-D2 e C-3PO', 'naïve café déjà vu', 'ÉPICO', 'a e o de da do'
+    ]
+
+@pytest.mark.parametrize('cache_size', [100000, 2])
+def test_preprocess_igual_ao_original(cache_size):
+    # Com o cache pequeno as palavras saem e voltam do cache no meio do
+    # texto; a segunda passada lê tudo do cache.
+    preprocessor = TextPreprocessor(cache_size=cache_size)
+    lista = list(textos())
+    for _ in range(2):
+        for texto in lista:
+            assert preprocessor.preprocess(texto) == preprocess_original(preprocessor, texto), texto
+
+def test_estatisticas_do_cache():
+    preprocessor = TextPreprocessor()
+    preprocessor.preprocess('filme filme diretor')
+    estatisticas = preprocessor.estatisticas_cache()
+    assert (estatisticas['hits'], estatisticas['misses'], estatisticas['tamanho']) == (1, 2, 2)
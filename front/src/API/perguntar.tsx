@@ -1,10 +1,14 @@
+// Id da conversa devolvido pelo servidor; mandado de volta em cada pergunta
+// para que perguntas como "e o ano?" usem o filme anterior.
+let conversaId = null;
+
 export const perguntar = async (pergunta) => {
   try {
     const resposta = await fetch("http://localhost:5000/perguntar", {
       method: "POST",
-      credentials: "include",
       headers: {
         "Content-Type": "application/json",
+        ...(conversaId ? { "X-Conversa-Id": conversaId } : {}),
       },
       body: JSON.stringify({
         pergunta: pergunta,
@@ -16,7 +20,11 @@ export const perguntar = async (pergunta) => {
       throw new Error(erroData.erro || `Erro HTTP: ${resposta.status}`);
     }
 
-    return await resposta.json();
+    const data = await resposta.json();
+    if (data.conversa_id) {
+      conversaId = data.conversa_id;
+    }
+    return data;
   } catch (error) {
     console.error("Erro na chamada API:", error);
     throw error;